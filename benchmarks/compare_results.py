@@ -0,0 +1,45 @@
+""" Compare two JSON files made by run_benchmarks.py
+
+    Usage:
+        python benchmarks/compare_results.py old.json new.json --threshold 1.2
+"""
+import argparse
+import json
+import sys
+
+
+def load_stages(path: str) -> dict:
+    with open(path) as f:
+        return {s['stage']: s for s in json.load(f)['stages']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare benchmark results')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Stage is reported as a regression if it is slower or takes more memory by this factor')
+    args = parser.parse_args()
+
+    baseline, current = load_stages(args.baseline), load_stages(args.current)
+    regressions = list()
+    print(f"{'stage':<55} {'old, s':>10} {'new, s':>10} {'ratio':>7} {'old, MB':>10} {'new, MB':>10}")
+    for stage, new in current.items():
+        old = baseline.get(stage)
+        if old is None:
+            print(f"{stage:<55} {'-':>10} {new['seconds']:>10.3f}")
+            continue
+        ratio = new['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        old_mem, new_mem = old.get('peak_memory_mb'), new.get('peak_memory_mb')
+        print(f"{stage:<55} {old['seconds']:>10.3f} {new['seconds']:>10.3f} {ratio:>7.2f} "
+              f"{old_mem if old_mem is not None else '-':>10} {new_mem if new_mem is not None else '-':>10}")
+        if ratio > args.threshold or (old_mem and new_mem and new_mem / old_mem > args.threshold):
+            regressions.append(stage)
+
+    if regressions:
+        print(f'\nRegressions (threshold {args.threshold}): {regressions}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+""" Benchmark of import time of the package modules.
+
+    Every module is imported in a fresh interpreter several times, the best time is taken.
+    Heavy dependencies loaded by the import are reported too, so an eager import of them is easy to notice.
+    Results are saved in the format of run_benchmarks.py, so they can be compared with compare_results.py.
+
+    Usage:
+        python benchmarks/import_time.py --output benchmarks/results/import_new.json
+"""
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['data_fast_insights', 'data_fast_insights.calculations', 'data_fast_insights.plotting',
+           'data_fast_insights.experimental', 'data_fast_insights.utils']
+# statement importing names as a user (or a worker process) does
+STATEMENTS = {'from data_fast_insights import BinaryDependenceModelData': 'model class',
+              'from data_fast_insights.calculations import calculate_dependence': 'calculate_dependence',
+              'from data_fast_insights.calculations import make_bins': 'make_bins',
+              'from data_fast_insights.plotting import render_report': 'render_report',
+              'from data_fast_insights.plotting import plot_segments_basic_info': 'plot_segments_basic_info'}
+HEAVY_DEPENDENCIES = ['pandas', 'numba', 'scorecardpy', 'matplotlib', 'matplotlib.pyplot', 'statsmodels', 'sklearn']
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement: str, repeat: int) -> dict:
+    """ Best time of the statement over several fresh interpreters and heavy dependencies it loads
+    """
+    code = _PROBE.format(root=ROOT, statement=statement, heavy=HEAVY_DEPENDENCIES)
+    runs = list()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {'seconds': round(min(r['seconds'] for r in runs), 4), 'loaded': runs[0]['loaded']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time benchmark of data_fast_insights')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per import')
+    parser.add_argument('--output', help='Path of JSON file with results')
+    args = parser.parse_args()
+
+    statements = {f'import {module}': f'import {module}' for module in MODULES}
+    statements.update({statement: f'import {name}' for statement, name in STATEMENTS.items()})
+
+    stages = list()
+    for statement, name in statements.items():
+        result = measure(statement, args.repeat)
+        stages.append({'stage': name, 'statement': statement, 'seconds': result['seconds'],
+                       'loaded_dependencies': result['loaded']})
+        print(f"{name:<55} {result['seconds']:>10.3f} s  {', '.join(result['loaded']) or '-'}", flush=True)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'stages': stages,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results are saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
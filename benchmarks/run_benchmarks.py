@@ -0,0 +1,171 @@
+""" Benchmark of the full insights pipeline on synthetic data.
+
+    Every stage is timed and its peak memory is measured with tracemalloc,
+    results are saved as JSON, so they can be compared between releases with compare_results.py.
+
+    Usage:
+        python benchmarks/run_benchmarks.py --scale medium --output benchmarks/results/0.2.1.1_medium.json
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_fast_insights import BinaryDependenceModelData  # noqa: E402
+import data_fast_insights.calculations as calc  # noqa: E402
+from data_fast_insights.experimental import SplitApplyCombineModelData  # noqa: E402
+
+from synthetic import make_synthetic_data  # noqa: E402
+
+SCALES = {
+    'small': {'n_rows': 10000, 'n_num': 5, 'n_cat': 5, 'cat_cardinality': 5},
+    'medium': {'n_rows': 100000, 'n_num': 10, 'n_cat': 10, 'cat_cardinality': 10},
+    'large': {'n_rows': 1000000, 'n_num': 20, 'n_cat': 20, 'cat_cardinality': 20},
+}
+
+
+class StageRecorder:
+    """ Collects time and peak memory of benchmark stages
+    """
+    def __init__(self, track_memory: bool = True):
+        self.track_memory = track_memory
+        self.stages = list()
+
+    @contextmanager
+    def measure(self, name: str, **info):
+        if self.track_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - start
+            peak = None
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            self.stages.append({'stage': name, 'seconds': round(seconds, 4),
+                                'peak_memory_mb': None if peak is None else round(peak, 2), **info})
+            print(f"{name:<55} {seconds:>10.3f} s" + ('' if peak is None else f" {peak:>10.1f} MB"), flush=True)
+
+
+def run_pipeline(params: dict, recorder: StageRecorder, comb_max_size: int, sac_partitions: int) -> None:
+    synthetic = make_synthetic_data(**params)
+    df, y_name = synthetic['data'], synthetic['y_name']
+    cat_cols, num_cols = synthetic['cat_cols'], synthetic['num_cols']
+    y_type = 'binary' if params.get('target') == 'binary' else 'quantile'
+
+    with recorder.measure('BinaryDependenceModelData.__init__', rows=df.shape[0]):
+        dmd = BinaryDependenceModelData(df, y_name, cat_cols=cat_cols, num_cols=num_cols, y_type=y_type)
+    with recorder.measure('make_bins', features=len(num_cols)):
+        bins = calc.make_bins(model_data=dmd)
+    with recorder.measure('convert_to_binary') as info:
+        dmd.convert_to_binary(bins=bins)
+        info['segments'] = len(dmd.get_segment_names())
+    with recorder.measure('calculate_dependence') as info:
+        res = calc.calculate_dependence(model_data=dmd)
+        info['segments'] = res.shape[0]
+    with recorder.measure('compare_intervals'):
+        calc.compare_intervals(selected=f"{sorted(cat_cols)[0]}_v0", model_data=dmd)
+
+    with recorder.measure('construct_partial_combs') as info:
+        dmd.construct_partial_combs(sorted(cat_cols)[0])
+        info['segments'] = len(dmd.get_segment_names())
+    with recorder.measure('calculate_dependence (partial combinations)') as info:
+        info['segments'] = calc.calculate_dependence(model_data=dmd).shape[0]
+
+    if comb_max_size >= 2:
+        dmd.convert_to_binary(bins=bins)
+        with recorder.measure('construct_combs_up_to', comb_max_size=comb_max_size) as info:
+            dmd.construct_combs_up_to(comb_max_size)
+            info['segments'] = len(dmd.get_segment_names())
+        with recorder.measure('calculate_dependence (all combinations)') as info:
+            info['segments'] = calc.calculate_dependence(model_data=dmd).shape[0]
+
+    if sac_partitions > 0:
+        sac_df = make_synthetic_data(**{**params, 'n_partitions': sac_partitions})['data']
+        with recorder.measure('SplitApplyCombineModelData.__init__', rows=sac_df.shape[0]):
+            sac = SplitApplyCombineModelData(sac_df, y_name, cat_cols, num_cols | {'partition'}, y_type)
+        with recorder.measure('SplitApplyCombineModelData.make_bins'):
+            sac.global_num_bins = calc.make_bins(model_data=sac)
+        with recorder.measure('SplitApplyCombineModelData.split', partitions=sac_partitions):
+            sac.split('partition')
+        with recorder.measure('SplitApplyCombineModelData.multiple_singular_experiments'):
+            sac.multiple_singular_experiments(y_type=y_type)
+        with recorder.measure('SplitApplyCombineModelData.filter_transpose_results'):
+            sac.filter_transpose_results()
+        with recorder.measure('SplitApplyCombineModelData.fill_defaults'):
+            sac.fill_defaults()
+        with recorder.measure('SplitApplyCombineModelData.reduce') as info:
+            sac.reduce()
+            info['segments'] = sac.total_res.shape[0]
+
+
+def get_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version('data_fast_insights')
+    except Exception:
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of data_fast_insights pipeline on synthetic data')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--rows', type=int, help='Number of rows (overrides scale)')
+    parser.add_argument('--num-cols', type=int, help='Number of numeric features (overrides scale)')
+    parser.add_argument('--cat-cols', type=int, help='Number of categorical features (overrides scale)')
+    parser.add_argument('--cardinality', type=int, help='Cardinality of categorical features (overrides scale)')
+    parser.add_argument('--target', choices=['normal', 'lognormal', 'binary'], default='normal')
+    parser.add_argument('--comb-max-size', type=int, default=2)
+    parser.add_argument('--sac-partitions', type=int, default=5,
+                        help='Number of partitions for split-apply-combine chain, 0 to skip it')
+    parser.add_argument('--no-memory', action='store_true', help='Do not measure memory (faster)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Path of JSON file with results')
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for key, value in [('n_rows', args.rows), ('n_num', args.num_cols), ('n_cat', args.cat_cols),
+                       ('cat_cardinality', args.cardinality)]:
+        if value is not None:
+            params[key] = value
+    params.update({'target': args.target, 'seed': args.seed})
+
+    recorder = StageRecorder(track_memory=not args.no_memory)
+    total_start = time.perf_counter()
+    run_pipeline(params, recorder, args.comb_max_size, args.sac_partitions)
+
+    results = {
+        'meta': {
+            'version': get_version(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scale': args.scale,
+            'params': {**params, 'comb_max_size': args.comb_max_size, 'sac_partitions': args.sac_partitions},
+            'total_seconds': round(time.perf_counter() - total_start, 4),
+        },
+        'stages': recorder.stages,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results are saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+""" Synthetic data generators for benchmarks
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_synthetic_data(n_rows: int = 100000,
+                        n_num: int = 5,
+                        n_cat: int = 5,
+                        cat_cardinality: int = 10,
+                        target: str = 'normal',
+                        nan_share: float = 0.01,
+                        n_partitions: int = 0,
+                        seed: int = 0) -> dict:
+    """ Make a DataFrame with numeric and categorical features and a target that depends on some of them.
+
+    Parameters
+    ----------
+    n_rows
+        Number of rows
+    n_num
+        Number of numeric features ("num_0", "num_1", ...)
+    n_cat
+        Number of categorical features ("cat_0", "cat_1", ...)
+    cat_cardinality
+        Number of unique values of every categorical feature. Values frequencies follow Zipf-like distribution
+    target
+        Target distribution:
+            "normal" - continuous target,
+            "lognormal" - skewed continuous target (e.g. revenue),
+            "binary" - 0 / 1 target
+    nan_share
+        Share of missing values in numeric features
+    n_partitions
+        If positive, "partition" column with this number of values is added (for split-apply-combine)
+    seed
+        Random seed
+
+    Returns
+    -------
+    dict
+        "data" - DataFrame, "y_name" - target name, "cat_cols", "num_cols" - sets of feature names
+    """
+    rng = np.random.default_rng(seed)
+    data = dict()
+    signal = np.zeros(n_rows)
+
+    for i in range(n_num):
+        values = rng.normal(0, 1, n_rows) if i % 2 else rng.gamma(2, 2, n_rows)
+        signal += values * (0.5 / (i + 1))
+        values[rng.random(n_rows) < nan_share] = np.nan
+        data[f'num_{i}'] = values.round(2)
+
+    frequencies = 1 / np.arange(1, cat_cardinality + 1)
+    frequencies /= frequencies.sum()
+    for i in range(n_cat):
+        codes = rng.choice(cat_cardinality, n_rows, p=frequencies)
+        signal += (codes == 0) * (1.0 / (i + 1))
+        data[f'cat_{i}'] = pd.Categorical.from_codes(codes, [f'v{k}' for k in range(cat_cardinality)]).astype(str)
+
+    noise = rng.normal(0, 1, n_rows)
+    if target == 'normal':
+        y = 100 + 10 * (signal + noise)
+    elif target == 'lognormal':
+        y = np.exp(1 + 0.3 * (signal + noise))
+    elif target == 'binary':
+        y = (signal + noise > np.median(signal + noise)).astype(int)
+    else:
+        raise ValueError('Unknown target, please use one of the following: "normal", "lognormal", "binary"')
+    data['y'] = y
+
+    if n_partitions > 0:
+        data['partition'] = rng.integers(0, n_partitions, n_rows)
+
+    return {'data': pd.DataFrame(data),
+            'y_name': 'y',
+            'cat_cols': {f'cat_{i}' for i in range(n_cat)},
+            'num_cols': {f'num_{i}' for i in range(n_num)}}
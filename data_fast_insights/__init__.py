@@ -1,8 +1,34 @@
-import pandas as pd
+""" Modules and classes of the package are imported on first use (PEP 562),
+    so "import data_fast_insights" is cheap, and heavy dependencies (scorecardpy, matplotlib)
+    are loaded only by the functions using them.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from ._binary_dependence_model_data import BinaryDependenceModelData
+if TYPE_CHECKING:
+    from ._binary_dependence_model_data import BinaryDependenceModelData
+    from ._shared_memory import SharedModelData
+    from ._segment_results import SegmentResults
 
-# For correct display of resulting dataframes
-pd.set_option('display.max_columns', 20)
+_lazy_attributes = {'BinaryDependenceModelData': '._binary_dependence_model_data',
+                    'SharedModelData': '._shared_memory',
+                    'SegmentResults': '._segment_results'}
+_lazy_submodules = {'calculations', 'experimental', 'kernels', 'plotting', 'profiling', 'resources', 'server',
+                     'utils'}
 
-__all__ = ['BinaryDependenceModelData']
+__all__ = ['BinaryDependenceModelData', 'SharedModelData', 'SegmentResults']
+
+
+def __getattr__(name: str):
+    if name in _lazy_attributes:
+        value = getattr(import_module(_lazy_attributes[name], __name__), name)
+    elif name in _lazy_submodules:
+        value = import_module('.' + name, __name__)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | _lazy_submodules)
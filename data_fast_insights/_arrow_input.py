@@ -0,0 +1,72 @@
+""" Adapters for Arrow-based inputs: pyarrow Tables, Parquet files and Polars DataFrames.
+
+    Only the columns used by the model are converted (or read from disk for Parquet),
+    string columns are kept dictionary-encoded (pandas categoricals) instead of being materialized as Python objects.
+"""
+from typing import Iterable
+
+import pandas as pd
+
+
+def is_arrow_input(data) -> bool:
+    """ Whether data is a pyarrow Table or a Polars DataFrame
+    """
+    module = type(data).__module__.split('.')[0]
+    return (module == 'pyarrow' and type(data).__name__ == 'Table') or \
+        (module == 'polars' and type(data).__name__ == 'DataFrame')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('pyarrow is required for Arrow and Parquet inputs, install it with "pip install pyarrow"')
+    return pyarrow
+
+
+def arrow_to_pandas(data, columns: Iterable[str]) -> pd.DataFrame:
+    """ Convert selected columns of a pyarrow Table or a Polars DataFrame to pandas.
+
+    Parameters
+    ----------
+    data
+        pyarrow.Table or polars.DataFrame
+    columns
+        Columns to convert, other columns are skipped. Columns missing in data are ignored
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    _import_pyarrow()
+    columns = [c for c in dict.fromkeys(columns) if c in data.columns]
+    if type(data).__module__.split('.')[0] == 'polars':
+        # polars frames are backed by Arrow memory, so conversion is mostly zero-copy
+        data = data.select(columns).to_arrow()
+    else:
+        data = data.select(columns)
+    # split_blocks keeps numeric columns as separate (mostly zero-copy) arrays instead of consolidating them
+    return data.to_pandas(strings_to_categorical=True, split_blocks=True)
+
+
+def read_parquet(path: str, columns: Iterable[str], filter=None) -> pd.DataFrame:
+    """ Read only the selected columns of a Parquet file or a directory of Parquet files (hive partitioning) to pandas.
+
+    Parameters
+    ----------
+    path
+    columns
+        Columns to read, columns missing in the data are ignored
+    filter
+        Optional pyarrow.dataset expression to filter rows while reading, e.g. pyarrow.dataset.field('x') > 0
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    _import_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    columns = [c for c in dict.fromkeys(columns) if c in dataset.schema.names]
+    return arrow_to_pandas(dataset.to_table(columns=columns, filter=filter), columns)
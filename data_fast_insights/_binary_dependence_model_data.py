@@ -1,16 +1,47 @@
 import numbers
-from typing import Iterable, Optional
-from itertools import combinations
+from typing import Callable, Iterable, Optional, Union
+from itertools import combinations, islice
 import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import time
 from collections import OrderedDict
 import json
 
 import numpy as np
 import pandas as pd
 
+from data_fast_insights import kernels
+from data_fast_insights._arrow_input import is_arrow_input, arrow_to_pandas, read_parquet
+from data_fast_insights._shared_memory import SharedModelData
+from data_fast_insights.profiling import profiled, get_profiler
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Max number of cells of combined binary features calculated at once
+_COMBS_BATCH_CELLS = 2 ** 24
+# Min interval between progress messages of combination builds, in seconds
+_PROGRESS_LOG_INTERVAL = 10
+# Version of the layout of saved model data (see BinaryDependenceModelData.save)
+_STORE_VERSION = 1
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q):
+    """ Quantile(s) of values where every value is repeated "weight" times.
+        For integer weights result equals pandas quantile (linear interpolation) on repeated values.
+    """
+    valid = ~np.isnan(values) & (weights > 0)
+    order = np.argsort(values[valid], kind='stable')
+    sorted_values = values[valid][order]
+    cum_weights = np.cumsum(weights[valid][order])
+    position = np.clip((cum_weights[-1] - 1) * np.asarray(q, dtype=float), 0, None)
+    lower = np.minimum(np.searchsorted(cum_weights, np.floor(position), side='right'), len(sorted_values) - 1)
+    upper = np.minimum(np.searchsorted(cum_weights, np.ceil(position), side='right'), len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - np.floor(position))
+
 
 class BinaryDependenceModelData:
     """ Class for storing data about features and target
@@ -22,6 +53,7 @@ class BinaryDependenceModelData:
     """
 
     # TODO: attributes description, since they are useful
+    @profiled('__init__', model_arg='self')
     def __init__(self,
                  base_data: pd.DataFrame,
                  y_name: str,
@@ -29,6 +61,10 @@ class BinaryDependenceModelData:
                  num_cols: Optional[Iterable[str]] = None,
                  y_type: Optional[str] = "quantile",
                  exclude_zero_var: Optional[bool] = True,
+                 weight_col: Optional[str] = None,
+                 y_is_sum: Optional[bool] = False,
+                 sample: Optional[Union[float, int]] = None,
+                 random_state: Optional[int] = None,
                  **kwargs) -> None:
         """ Initialize object that holds all information about features and target in its attributes.
             This object is supposed to be used further in the calculations of target analysis model.
@@ -36,7 +72,9 @@ class BinaryDependenceModelData:
         Parameters
         ----------
         base_data
-            DataFrame with raw data.
+            DataFrame with raw data. pyarrow Table and Polars DataFrame are also accepted (pyarrow is required):
+            only y_name, weight_col, cat_cols and num_cols columns are converted to pandas,
+            string columns are converted to pandas categoricals. See also from_parquet()
         y_name
             Name of the target variable. It must be made in a way that higher values indicate better benefit
         cat_cols
@@ -55,16 +93,42 @@ class BinaryDependenceModelData:
                 0 values are considered to be worsening the target
 
             Defaults to "quantile" with value of 0.5
+            For "quantile" and "mean" the threshold can also be fixed with "y_pivot" argument
+            (e.g. threshold calculated on all data when model data is built on a part of it)
         exclude_zero_var
             If True:
                 - checks categorical features and excludes those having 1 unique value
                 - checks numeric features and excludes those having variance = 0
             In case you've passed a dataset with such features already excluded, you might set this to False
             for potential speed up
+        weight_col
+            Name of the column with row weights (e.g. counts of objects in pre-aggregated data).
+            Every row is treated as weight_col objects with the same features and target.
+            Weights must be non-negative numbers. If not set, every row is a single object
+        y_is_sum
+            Only used with weight_col. If True, y_name column contains the sum of the target
+            over the objects of the row (not the target value itself),
+            so target value of the row is y_name / weight_col.
+            Not supported for "binary" y_type
+        sample
+            If set, only a sample of rows is kept for fast exploratory runs:
+                float between 0 and 1 - fraction of rows to keep,
+                int - max number of rows to keep.
+            Sample is stratified on the binary target, which is built on all rows before sampling.
+            Sampled rows get weights (number of objects each of them represents),
+            so calculations.calculate_dependence() returns estimates with confidence intervals.
+            Not supported together with weight_col
+        random_state
+            Seed for sampling
         """
-        if not isinstance(base_data, pd.DataFrame):
-            raise TypeError('base_data argument must be a DataFrame object')
-        self.base_data = base_data.copy()
+        if is_arrow_input(base_data):
+            # converted frame is not shared with the caller, so it is not copied
+            base_data = arrow_to_pandas(base_data, [y_name, weight_col, *(cat_cols or []), *(num_cols or [])])
+            self.base_data = base_data
+        elif isinstance(base_data, pd.DataFrame):
+            self.base_data = base_data.copy()
+        else:
+            raise TypeError('base_data argument must be a DataFrame object (or a pyarrow Table / Polars DataFrame)')
 
         # SET CATEGORICAL AND NUMERIC COLUMNS
         try:
@@ -85,6 +149,27 @@ class BinaryDependenceModelData:
             raise ValueError(f'y_name set as {y_name} not found in base_data')
         self.y_name = y_name
 
+        # SET WEIGHTS
+        self.weight_col = weight_col
+        self.weights = None
+        if weight_col is not None:
+            if weight_col not in base_data.columns:
+                raise ValueError(f'weight_col set as {weight_col} not found in base_data')
+            if weight_col == y_name or any(weight_col in s for s in self.feature_sets):
+                raise ValueError('weight_col must not be the target or one of cat_cols, num_cols')
+            self.weights = pd.to_numeric(self.base_data[weight_col], errors='raise')
+            if (self.weights < 0).any() or self.weights.isnull().any():
+                raise ValueError('weight_col values must be non-negative numbers')
+            if y_is_sum:
+                if y_type == 'binary':
+                    raise ValueError('y_is_sum is not supported for "binary" y_type; '
+                                     + 'aggregate data by the target as well and use weight_col only')
+                self.base_data[y_name] = self.base_data[y_name] / self.weights.where(self.weights > 0)
+        elif y_is_sum:
+            raise ValueError('y_is_sum can only be used together with weight_col')
+        if sample is not None and weight_col is not None:
+            raise ValueError('sample can not be used together with weight_col')
+
         # SET TARGET PROCESSING DATA
         self.target_processing_attrs = dict()
         if y_type == 'quantile':
@@ -94,6 +179,10 @@ class BinaryDependenceModelData:
             self.target_processing_attrs['y_type'] = y_type
         else:
             raise ValueError('Unknown y_type, please use one of the following: "quantile", "mean", "binary"')
+        if kwargs.get('y_pivot') is not None:
+            if y_type == 'binary':
+                raise ValueError('y_pivot can not be used with "binary" y_type')
+            self.target_processing_attrs['y_pivot'] = kwargs['y_pivot']
 
         # SET OTHER
         self.exclude_zero_var = exclude_zero_var
@@ -106,8 +195,42 @@ class BinaryDependenceModelData:
         self.bins = None
         self.y_binary_name = None
         self.is_data_converted = False
+        self.sampling = None
 
         self._reset_binary_data()
+        if sample is not None:
+            self._sample_rows(sample, random_state)
+
+    @classmethod
+    def from_parquet(cls,
+                     path: str,
+                     y_name: str,
+                     cat_cols: Optional[Iterable[str]] = None,
+                     num_cols: Optional[Iterable[str]] = None,
+                     filter=None,
+                     **kwargs) -> 'BinaryDependenceModelData':
+        """ Make model data from a Parquet file or a directory of Parquet files (pyarrow is required).
+            Only y_name, weight_col, cat_cols and num_cols columns are read from disk.
+
+        Parameters
+        ----------
+        path
+        y_name, cat_cols, num_cols
+            See init
+        filter
+            Optional pyarrow.dataset expression to filter rows while reading
+        kwargs
+            Other init arguments
+
+        Returns
+        -------
+        BinaryDependenceModelData
+        """
+        cat_cols = list(cat_cols) if cat_cols is not None else None
+        num_cols = list(num_cols) if num_cols is not None else None
+        columns = [y_name, kwargs.get('weight_col'), *(cat_cols or []), *(num_cols or [])]
+        return cls(read_parquet(path, [c for c in columns if c is not None], filter), y_name, cat_cols, num_cols,
+                   **kwargs)
 
     def _reset_binary_data(self):
         self.data = self.base_data[[self.y_name]].copy()
@@ -117,14 +240,55 @@ class BinaryDependenceModelData:
         self.bins = None
         self.y_binary_name = None
         self.is_data_converted = False
+        # models of drilled down segments use binary features of this data, they are made again after changes
+        self._drill_down_cache = dict()
+        # segments removed by dedup_segments(): {kept segment: [removed segments]}
+        self.segment_equivalents = dict()
 
         self._check_columns()
         self._convert_types()
         self.add_binary_target()
 
+    def _sample_rows(self, sample: Union[float, int], random_state: Optional[int] = None) -> None:
+        """ Keep a sample of rows stratified on the binary target and set weights of sampled rows.
+            Target threshold is fixed, so it is the one calculated on all rows.
+        """
+        n_rows = self.data.shape[0]
+        if isinstance(sample, numbers.Integral) and not isinstance(sample, bool) and sample >= 1:
+            sample_size = min(int(sample), n_rows)
+        elif isinstance(sample, numbers.Real) and 0 < sample <= 1:
+            sample_size = int(round(sample * n_rows))
+        else:
+            raise ValueError('sample must be either a fraction between 0 and 1 or a positive number of rows')
+
+        rng = np.random.default_rng(random_state)
+        y_binary = self.data[self.y_binary_name].to_numpy()
+        positions = list()
+        design_weights = np.empty(n_rows)
+        strata = dict()
+        for stratum in np.unique(y_binary):
+            stratum_positions = np.flatnonzero(y_binary == stratum)
+            stratum_size = stratum_positions.shape[0]
+            # at least 2 rows per stratum are needed for variance estimates
+            stratum_sample_size = min(stratum_size, max(2, int(round(sample_size * stratum_size / n_rows))))
+            positions.append(rng.choice(stratum_positions, stratum_sample_size, replace=False))
+            design_weights[stratum_positions] = stratum_size / stratum_sample_size
+            strata[int(stratum)] = {'n_rows': stratum_size, 'sample_size': stratum_sample_size}
+        positions = np.sort(np.concatenate(positions))
+
+        self.sampling = {'n_rows': n_rows,
+                         'sample_size': positions.shape[0],
+                         'strata': strata,
+                         'y_mean': self.base_data[self.y_name].mean()}
+        if self.y_pivot is not None:
+            self.target_processing_attrs['y_pivot'] = self.y_pivot
+        self.base_data = self.base_data.iloc[positions]
+        self.data = self.data.iloc[positions]
+        self.weights = pd.Series(design_weights[positions], index=self.base_data.index)
+
     def _check_columns(self) -> None:
         unmentioned = [col for col in self.base_data.columns if not any(col in s for s in self.feature_sets)
-                       and col != self.y_name]
+                       and col not in (self.y_name, self.weight_col)]
         if unmentioned:
             raise ValueError(
                 f'Found {len(unmentioned)} column(s) in data '
@@ -160,17 +324,40 @@ class BinaryDependenceModelData:
     def get_y_pivot(self, y_series: pd.Series) -> pd.Series:
         """ Get the value that divides objects into "bad" and "good"
         """
+        if self.target_processing_attrs.get('y_pivot') is not None:
+            return self.target_processing_attrs['y_pivot']
         if self.target_processing_attrs['y_type'] == 'mean':
+            if self.weights is not None:
+                valid = y_series.notnull()
+                return (y_series[valid] * self.weights[valid]).sum() / self.weights[valid].sum()
             return y_series.mean()
         elif self.target_processing_attrs['y_type'] == 'quantile':
             if not isinstance(self.target_processing_attrs['y_quantile'], numbers.Number):
                 raise ValueError('quantile argument must be either None or a number')
-            return y_series.quantile(self.target_processing_attrs['y_quantile'])
+            return self.get_target_quantiles(self.target_processing_attrs['y_quantile'], y_series)
         elif self.target_processing_attrs['y_type'] == 'binary':
             return None
         else:
             raise ValueError("Unknown y type")
 
+    def get_target_quantiles(self, q, y_series: Optional[pd.Series] = None):
+        """ Get quantile(s) of the target, taking row weights into account if they are set
+
+        Parameters
+        ----------
+        q
+            Number or array of numbers between 0 and 1
+        y_series
+            Target values, defaults to the target column of base_data
+        """
+        if y_series is None:
+            y_series = self.base_data[self.y_name]
+        if self.weights is not None:
+            res = _weighted_quantile(y_series.to_numpy(dtype=float), self.weights.to_numpy(dtype=float), q)
+            return float(res) if np.ndim(res) == 0 else res
+        res = y_series.quantile(q)
+        return res.to_numpy() if isinstance(res, pd.Series) else res
+
     def add_binary_target(self) -> None:
         self.y_pivot = self.get_y_pivot(self.base_data[self.y_name])
 
@@ -186,34 +373,199 @@ class BinaryDependenceModelData:
         self.y_binary_name = 'is_' + self.y_name + '_lt_' + self.target_processing_attrs['y_type']
         self.data[self.y_binary_name] = self.base_data[self.y_name] < self.y_pivot
 
-    def _convert_cats(self) -> None:
-        """ Converting categories to binary (one-hot encoding)
+    def profile_report(self) -> pd.DataFrame:
+        """ Summary of time, memory, rows and segments by stage of the model.
+            See data_fast_insights.profiling for details and hooks
+        """
+        return get_profiler(self).report()
+
+    def get_segment_names(self) -> list:
+        """ Names of binary features (segments) in data, in the order of columns
+        """
+        unwanted = {self.y_name, self.y_binary_name}
+        return [c for c in self.data.columns if c not in unwanted]
+
+    @classmethod
+    def _from_state(cls, state: dict) -> 'BinaryDependenceModelData':
+        """ Make an object from its attributes without running init (no columns checks and target processing)
         """
-        for col in self.cat_cols:
-            for val in self.base_data[col].unique():
-                binary_name = col + '_' + str(val)
-                self.data[binary_name] = (self.base_data[col] == val).astype(int)
-                self.col_links[binary_name] = col
-        # self.data = self.data.drop(self.cat_cols, 1)
-
-    def _convert_nums(self, bins: dict) -> None:
-        """ Converting numeric to binary (binning)
+        model_data = cls.__new__(cls)
+        model_data.__dict__.update(state)
+        return model_data
+
+    def save(self, path: str) -> None:
+        """ Save converted state (binary features, target, bins, col_links, target pivot etc.) to a directory,
+            so it can be loaded in another process with load() without running make_bins and convert_to_binary again.
+
+            Files in the directory:
+                segments.npy - binary features matrix (rows x segments),
+                y.npy, y_binary.npy - target and binary target,
+                base_data.pkl - raw data,
+                state.pkl - other attributes (bins, col_links, y_pivot, weights, ...)
+
+        Parameters
+        ----------
+        path
+            Path of the directory, it is created if needed. Existing files are overwritten
+        """
+        os.makedirs(path, exist_ok=True)
+        segments = self.get_segment_names()
+        np.save(os.path.join(path, 'segments.npy'), self.data[segments].to_numpy())
+        np.save(os.path.join(path, 'y.npy'), self.data[self.y_name].to_numpy())
+        np.save(os.path.join(path, 'y_binary.npy'), self.data[self.y_binary_name].to_numpy())
+        self.base_data.to_pickle(os.path.join(path, 'base_data.pkl'))
+
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ('data', 'base_data', 'profiler', '_shared_handle', '_drill_down_cache')}
+        with open(os.path.join(path, 'state.pkl'), 'wb') as f:
+            pickle.dump({'version': _STORE_VERSION, 'attrs': state, 'index': self.data.index, 'segments': segments}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'BinaryDependenceModelData':
+        """ Load model data saved with save()
+
+        Parameters
+        ----------
+        path
+            Path of the directory
+        mmap
+            If True, binary features are memory-mapped (read-only) instead of being read into memory,
+            so loading is almost instant and the data is read from disk only when it is used.
+            Note that some pandas operations may still copy the features into memory
+
+        Returns
+        -------
+        BinaryDependenceModelData
         """
-        for col in self.num_cols:
-            for bin_ in bins[col]['bin']:
-                if bin_ == 'missing':
-                    binary_name = col + '_missing'
-                    self.data[binary_name] = np.where(self.base_data[col].isnull(), 1, 0)
-                else:
-                    binary_name = col + '_' + bin_
-                    lb, rb = (float(x) for x in bin_.strip('()[]').split(','))
-                    self.data[binary_name] = np.where(
-                        (self.base_data[col] >= float(lb)) & (self.base_data[col] < float(rb)), 1, 0)
-                self.col_links[binary_name] = col
-        # self.data = self.data.drop(self.num_cols, 1)
+        with open(os.path.join(path, 'state.pkl'), 'rb') as f:
+            stored = pickle.load(f)
+        if stored.get('version') != _STORE_VERSION:
+            raise ValueError(f'Unsupported version of saved model data: {stored.get("version")}, '
+                             + f'expected {_STORE_VERSION}')
+
+        model_data = cls._from_state(stored['attrs'])
+        model_data.base_data = pd.read_pickle(os.path.join(path, 'base_data.pkl'))
+        model_data._set_data_arrays(stored['index'], stored['segments'],
+                                    np.load(os.path.join(path, 'segments.npy'), mmap_mode='r' if mmap else None),
+                                    np.load(os.path.join(path, 'y.npy')), np.load(os.path.join(path, 'y_binary.npy')))
+        return model_data
+
+    def to_shared_memory(self) -> SharedModelData:
+        """ Copy binary features, target and weights to shared memory, so worker processes can use model data
+            without copying it: the returned handle is sent to workers, which call its attach() method.
+            Handle must be unlinked (or used as a context manager) by this process when workers are done:
+                with dmd.to_shared_memory() as shared:
+                    pool.map(func, [shared] * n_tasks)  # func calls shared.attach()
 
+        Returns
+        -------
+        SharedModelData
+        """
+        return SharedModelData(self)
+
+    def drill_down(self, segments: Union[str, Iterable[str]]) -> 'BinaryDependenceModelData':
+        """ Model data restricted to objects of a segment (or of a path of segments, one per level),
+            e.g. to find features that matter within a bad segment.
+
+            Data is not copied or converted again: child model data uses binary features of this object,
+            objects outside the segment get zero weights, so calculations (calculate_dependence(), make_bins(), ...)
+            and plots are relative to the segment: its size, its target mean. The binary target (target threshold) is kept.
+            Child models are cached by path until binary features of this object are changed.
+
+        Parameters
+        ----------
+        segments
+            Segment name or a list of segment names: drill_down(['a', 'b']) is drill_down('a').drill_down('b')
+
+        Returns
+        -------
+        BinaryDependenceModelData
+            Model data of the segment, drill_down_path attribute contains the path of segments from the root data
+        """
+        path = (segments,) if isinstance(segments, str) else tuple(segments)
+        cache = getattr(self, '_drill_down_cache', None)
+        if cache is None:
+            cache = self._drill_down_cache = dict()
+        model_data = self
+        for depth in range(1, len(path) + 1):
+            if path[:depth] not in cache:
+                # results of calculations on the child can be cached in its entry too
+                cache[path[:depth]] = {'model': model_data._drill_down_child(path[depth - 1])}
+            model_data = cache[path[:depth]]['model']
+        return model_data
+
+    def _drill_down_child(self, segment: str) -> 'BinaryDependenceModelData':
+        if segment not in self.col_links:
+            raise ValueError(f'Segment {segment} not found in col_links of model data')
+        mask = (self.data[segment] == 1).to_numpy()
+        weights = np.ones(mask.shape[0]) if self.weights is None else self.weights.to_numpy(dtype=float)
+
+        # data, base data and bins are shared, containers changed by combinations are copied
+        state = {k: v for k, v in self.__dict__.items() if k not in ('profiler', '_drill_down_cache')}
+        child = self._from_state(state)
+        child.col_links = OrderedDict(self.col_links)
+        child.target_processing_attrs = dict(self.target_processing_attrs)
+        child.weights = pd.Series(weights * mask, index=self.data.index)
+        # integer results stay integer if weights are just the row mask
+        child.weights_are_row_mask = self.weights is None or getattr(self, 'weights_are_row_mask', False)
+        # sample estimates (confidence intervals) are for all data, not for the segment
+        child.sampling = None
+        child.drill_down_path = getattr(self, 'drill_down_path', tuple()) + (segment,)
+        return child
+
+    def _set_data_arrays(self, index: pd.Index, segments: list, features: np.ndarray,
+                         y: np.ndarray, y_binary: np.ndarray) -> None:
+        """ Set data from arrays. 2D features array is not copied by DataFrame,
+            so memory-mapped (or shared memory) features stay there
+        """
+        target = pd.DataFrame({self.y_name: y, self.y_binary_name: y_binary}, index=index)
+        self.data = pd.concat([target, pd.DataFrame(features, index=index, columns=segments)], axis=1, copy=False)
+
+    def _convert_cat(self, col: str) -> list:
+        """ Converting a category to binary (one-hot encoding)
+
+        Returns
+        -------
+        list
+            (binary feature name, values) tuples
+        """
+        values = self.base_data[col]
+        # values are compared by integer codes instead of values (e.g. strings).
+        # Codes are given to non-missing values in order of appearance, same as order of unique()
+        codes = pd.factorize(values)[0]
+        features = list()
+        code = 0
+        for val in values.unique():
+            if pd.isnull(val):
+                binary = (values == val).to_numpy().astype(int)
+            else:
+                binary = (codes == code).astype(int)
+                code += 1
+            features.append((col + '_' + str(val), binary))
+        return features
+
+    def _convert_num(self, col: str, bins: dict) -> list:
+        """ Converting a numeric to binary (binning)
+
+        Returns
+        -------
+        list
+            (binary feature name, values) tuples
+        """
+        values = self.base_data[col]
+        features = list()
+        for bin_ in bins[col]['bin']:
+            if bin_ == 'missing':
+                features.append((col + '_missing', np.where(values.isnull(), 1, 0)))
+            else:
+                lb, rb = (float(x) for x in bin_.strip('()[]').split(','))
+                features.append((col + '_' + bin_, np.where((values >= lb) & (values < rb), 1, 0)))
+        return features
+
+    @profiled('convert_to_binary', model_arg='self')
     def convert_to_binary(self,
-                          bins: Optional[dict] = None) -> None:
+                          bins: Optional[dict] = None,
+                          n_threads: int = 1) -> None:
         """ Convert all variables to binary format.
 
         Parameters
@@ -222,6 +574,9 @@ class BinaryDependenceModelData:
             If there are numeric columns in class instance,
             bins argument (containing binning for every numeric column) must be specified,
             otherwise these columns are not converted.
+        n_threads
+            Number of threads converting features concurrently (most of the work is done by numpy without GIL).
+            Order of binary features doesn't depend on it
 
         Returns
         -------
@@ -230,11 +585,42 @@ class BinaryDependenceModelData:
         if self.is_data_converted:
             self._reset_binary_data()
         self.bins = dict() if bins is None else bins
-        self._convert_cats()
-        self._convert_nums(self.bins)
+
+        tasks = [(self._convert_cat, (col,)) for col in self.cat_cols] + \
+                [(self._convert_num, (col, self.bins)) for col in self.num_cols]
+        if n_threads > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                converted = list(executor.map(lambda task: task[0](*task[1]), tasks))
+        else:
+            converted = [func(*args) for func, args in tasks]
+
+        # same name from different values (e.g. 1 and "1") keeps the first position and the last values
+        new_features = dict()
+        for (func, args), features in zip(tasks, converted):
+            for name, values in features:
+                new_features[name] = values
+                self.col_links[name] = args[0]
+        if new_features:
+            # features are stacked as rows, so every binary feature is contiguous in memory
+            self._append_data(pd.DataFrame(np.array(list(new_features.values())).T,
+                                           columns=list(new_features), index=self.data.index))
         self.is_data_converted = True
 
-    def construct_partial_combs(self, selected_feature, consider_selected_base: bool = True):
+    def _append_data(self, new_data: pd.DataFrame) -> None:
+        """ Add columns to data at once (existing columns with the same names are replaced)
+        """
+        self._drill_down_cache = dict()
+        existing = [name for name in new_data.columns if name in self.data.columns]
+        for name in existing:
+            self.data[name] = new_data[name]
+        self.data = pd.concat([self.data, new_data.drop(columns=existing)], axis=1, copy=False)
+
+    @profiled('construct_partial_combs', model_arg='self')
+    def construct_partial_combs(self, selected_feature, consider_selected_base: bool = True,
+                                progress: Optional[Callable[[dict], None]] = None,
+                                cancel=None,
+                                time_budget: Optional[float] = None,
+                                memory_budget: Optional[int] = None) -> dict:
         """ Construct binary feature combinations of the selected feature and every other one.
                 These features equal 1 when all of its members equal 1.
 
@@ -262,11 +648,13 @@ class BinaryDependenceModelData:
                 otherwise it's the second feature from the combination.
 
             This is important for future analysis and plots. (Functions in plotting module group data by base column)
-
+        progress, cancel, time_budget, memory_budget
+            See construct_combs_up_to()
 
         Returns
         -------
-
+        dict
+            Build status, see construct_combs_up_to()
         """
         if not self.is_data_converted:
             raise ValueError("Can only use construct_combs_up_to() when data is converted to binary format")
@@ -275,14 +663,18 @@ class BinaryDependenceModelData:
         unwanted = [self.y_name, self.y_binary_name] + selected_binary
         other_binary = [c for c in list(self.data.columns) if c not in unwanted]
 
-        for sel in selected_binary:
-            for other in other_binary:
-                binary_name = sel + '_AND_' + other
-                self.data[binary_name] = np.logical_and(self.data[sel], self.data[other]).astype(int)
-                self.col_links[binary_name] = sel if consider_selected_base else other
-
-    # TODO: display progress in percentage instead of just combination levels
-    def construct_combs_up_to(self, comb_max_size: int) -> None:
+        features = self.data[selected_binary + other_binary].to_numpy()
+        combs = ((sel + '_AND_' + other, (i, len(selected_binary) + j), sel if consider_selected_base else other)
+                 for i, sel in enumerate(selected_binary) for j, other in enumerate(other_binary))
+        return self._build_combinations(combs, len(selected_binary) * len(other_binary), features,
+                                        progress, cancel, time_budget, memory_budget)
+
+    @profiled('construct_combs_up_to', model_arg='self')
+    def construct_combs_up_to(self, comb_max_size: int,
+                              progress: Optional[Callable[[dict], None]] = None,
+                              cancel=None,
+                              time_budget: Optional[float] = None,
+                              memory_budget: Optional[int] = None) -> Optional[dict]:
         """ Binary feature combinations of sizes up to comb_max_size are constructed as binary features.
                 These features equal 1 when all of its members equal 1.
 
@@ -305,10 +697,30 @@ class BinaryDependenceModelData:
         Parameters
         ----------
         comb_max_size : int
+        progress : callable, optional
+            Called after every batch of combinations with a dict:
+                done, total - number of constructed and all combinations,
+                percent - done / total * 100,
+                elapsed - seconds since the start, rate - combinations per second,
+                eta - estimated seconds left.
+            Progress is also logged (not more often than every 10 seconds)
+        cancel : optional
+            Object with is_set() method (e.g. threading.Event) or a callable returning bool.
+            When it is set, the build stops after the current batch
+        time_budget : float, optional
+            Max number of seconds of the build
+        memory_budget : int, optional
+            Max number of bytes of constructed combinations
+
+        When the build stops (cancelled or out of budget), combinations constructed so far are kept.
 
         Returns
         -------
-
+        dict
+            Build status:
+                completed - whether all combinations are constructed,
+                stopped_by - None, "cancel", "time_budget" or "memory_budget",
+                done, total, elapsed - same as in progress
         """
         if not self.is_data_converted:
             raise ValueError("Can only use construct_combs_up_to() when data is converted to binary format")
@@ -322,13 +734,176 @@ class BinaryDependenceModelData:
 
         unwanted = {self.y_name, self.y_binary_name}
         binary_features = {c for c in list(self.data.columns) if c not in unwanted}
+        features_order = list(binary_features)
+        features_position = {name: i for i, name in enumerate(features_order)}
+        features = self.data[features_order].to_numpy()
+
+        def binary_combs():
+            for comb_curr_size in range(2, _comb_max_size+1):
+                logger.info(f'Working on combinations of level {comb_curr_size} of {_comb_max_size}')
+                for comb in combinations(binary_features, comb_curr_size):
+                    yield '_AND_'.join(comb), [features_position[col] for col in comb], json.dumps(sorted(comb))
+
+        total = sum(math.comb(len(binary_features), k) for k in range(2, _comb_max_size+1))
+        return self._build_combinations(binary_combs(), total, features,
+                                        progress, cancel, time_budget, memory_budget)
+
+    def _build_combinations(self, combs: Iterable, total: int, features: np.ndarray,
+                            progress: Optional[Callable[[dict], None]] = None,
+                            cancel=None,
+                            time_budget: Optional[float] = None,
+                            memory_budget: Optional[int] = None) -> dict:
+        """ Calculate combinations of binary features in batches and add them to data.
+            New features are concatenated to data at once instead of inserting them one by one.
 
-        for comb_curr_size in range(2, _comb_max_size+1):
-            logger.info(f'Working on combinations of level {comb_curr_size} of {_comb_max_size}')
-            binary_combs = combinations(binary_features, comb_curr_size)
+        Parameters
+        ----------
+        combs
+            Iterable of (name, column indices of features, col_links value) for every combination
+        total
+            Number of combinations
+        features
+            2D array of binary features, rows x features
+        progress, cancel, time_budget, memory_budget
+            See construct_combs_up_to()
+        """
+        combs = iter(combs)
+        batch_size = max(1, _COMBS_BATCH_CELLS // max(1, features.shape[0]))
+        start = last_log = time.monotonic()
+        new_data = list()
+        status = {'completed': False, 'stopped_by': None, 'done': 0, 'total': total, 'elapsed': 0.0}
+        used_memory = 0
+
+        while True:
+            batch = list(islice(combs, batch_size))
+            if not batch:
+                status['completed'] = True
+                break
+            batch_memory = features.shape[0] * len(batch) * np.dtype(np.int64).itemsize
+            if memory_budget is not None and used_memory + batch_memory > memory_budget:
+                status['stopped_by'] = 'memory_budget'
+                break
+
+            # a batch may contain combinations of different sizes (levels)
+            for size in sorted({len(comb[1]) for comb in batch}):
+                same_size = [comb for comb in batch if len(comb[1]) == size]
+                new_data.append(pd.DataFrame(kernels.and_combine(features, [comb[1] for comb in same_size]),
+                                             columns=[comb[0] for comb in same_size],
+                                             index=self.data.index))
+            for name, _, link in batch:
+                self.col_links[name] = link
+            used_memory += batch_memory
+
+            now = time.monotonic()
+            status['done'] += len(batch)
+            status['elapsed'] = now - start
+            rate = status['done'] / status['elapsed'] if status['elapsed'] > 0 else float('inf')
+            info = {'done': status['done'], 'total': total, 'percent': 100 * status['done'] / max(total, 1),
+                    'elapsed': status['elapsed'], 'rate': rate, 'eta': (total - status['done']) / rate}
+            if progress is not None:
+                progress(info)
+            if now - last_log >= _PROGRESS_LOG_INTERVAL:
+                logger.info(f"Constructed {info['done']} of {total} combinations ({info['percent']:.1f}%), "
+                            + f"ETA {info['eta']:.0f} s")
+                last_log = now
+
+            if cancel is not None and (cancel() if callable(cancel) else cancel.is_set()):
+                status['stopped_by'] = 'cancel'
+                break
+            if time_budget is not None and status['elapsed'] >= time_budget:
+                status['stopped_by'] = 'time_budget'
+                break
+
+        if status['stopped_by'] is not None:
+            logging.warning(f"Combinations build stopped by {status['stopped_by']}: "
+                            + f"{status['done']} of {total} combinations are constructed")
+        if new_data:
+            self._append_data(pd.concat(new_data, axis=1, copy=False))
+        status['elapsed'] = time.monotonic() - start
+        return status
+
+    @profiled('dedup_segments', model_arg='self')
+    def dedup_segments(self, tolerance: float = 0.0, include_base: bool = False) -> dict:
+        """ Remove segments covering the same rows as another segment, e.g. a combination with a bin
+            covering almost all data, or a category coinciding with a numeric bin.
+            Meant to be run after constructing combinations and before calculations.
+
+            Identical segments are found by hashing bitsets of their rows.
+            With tolerance, a combination is also removed if it differs from one of its members
+            by not more than tolerance share of the member's rows (a combination is a subset of its members).
+            Removed segments are recorded in segment_equivalents: {kept segment: [removed segments]},
+            they are removed from data and col_links.
 
-            for comb in binary_combs:
-                binary_name = '_AND_'.join(comb)
-                self.data[binary_name] = np.logical_and.reduce([self.data[col] for col in comb]).astype(int)
+        Parameters
+        ----------
+        tolerance
+            Max share of rows of a member that a near-identical combination may lack, e.g. 0.001
+        include_base
+            If True, identical segments of base features (not combinations) are removed as well,
+            otherwise they are kept, so results and plots of base features are complete
 
-                self.col_links[binary_name] = json.dumps(sorted(comb))
+        Returns
+        -------
+        dict
+            segments - number of segments before deduplication,
+            removed - number of removed segments,
+            equivalents - {kept segment: [segments removed by this call]}
+        """
+        if not self.is_data_converted:
+            raise ValueError("Can only use dedup_segments() when data is converted to binary format")
+        segments = self.get_segment_names()
+        segment_set = set(segments)
+
+        def members(name):
+            parts = name.split('_AND_')
+            return parts if len(parts) > 1 and all(p in segment_set for p in parts) else list()
+
+        is_comb = [bool(members(s)) for s in segments]
+        features = self.data[segments].to_numpy()
+
+        # identical segments: equal bitsets of rows (bytes of packed bits are hashed by dict)
+        classes = dict()
+        for start in range(0, len(segments), 256):
+            packed = np.packbits(features[:, start:start + 256].T != 0, axis=1)
+            for offset, bitset in enumerate(packed):
+                classes.setdefault(bitset.tobytes(), list()).append(start + offset)
+
+        representative = dict()
+        for positions in classes.values():
+            # base segments go before combinations in data, so the first one is kept
+            kept = positions[0]
+            for pos in positions[1:]:
+                if include_base or is_comb[pos]:
+                    representative[segments[pos]] = segments[kept]
+
+        if tolerance > 0:
+            sizes = dict(zip(segments, (features != 0).sum(axis=0)))
+            for name, comb in zip(segments, is_comb):
+                if not comb or name in representative:
+                    continue
+                near = [(sizes[m] - sizes[name], m) for m in members(name)
+                        if sizes[m] - sizes[name] <= tolerance * sizes[m]]
+                if near:
+                    member = min(near)[1]
+                    representative[name] = representative.get(member, member)
+
+        equivalents = dict()
+        for name, kept in representative.items():
+            while kept in representative:
+                kept = representative[kept]
+            equivalents.setdefault(kept, list()).append(name)
+        recorded = getattr(self, 'segment_equivalents', None)
+        if recorded is None:
+            recorded = self.segment_equivalents = dict()
+        for kept, removed in equivalents.items():
+            recorded.setdefault(kept, list()).extend(removed)
+            for name in removed:
+                # segments that were equivalent to a removed one are now equivalent to the kept one
+                recorded[kept].extend(recorded.pop(name, list()))
+                self.col_links.pop(name, None)
+
+        if representative:
+            self.data = self.data.drop(columns=list(representative))
+            self._drill_down_cache = dict()
+        logger.info(f'Removed {len(representative)} of {len(segments)} segments as duplicates')
+        return {'segments': len(segments), 'removed': len(representative), 'equivalents': equivalents}
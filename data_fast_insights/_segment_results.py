@@ -0,0 +1,139 @@
+""" Results of calculations.calculate_dependence() with indexes for repeated queries.
+
+    Rows of base features, combinations containing a segment and orders of metrics are indexed once,
+    so slicing in interactive exploration and plotting doesn't filter the whole result every time:
+        results = SegmentResults(calc.calculate_dependence(model_data=dmd), dmd.col_links)
+        results.base('color')
+        results.containing('color_green')
+        results.top('group_importance', 10)
+        results.between('perc_of_total', low=5)
+"""
+import json
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class SegmentResults:
+    """ calculate_dependence() result with precomputed indexes:
+            base_col -> rows, segment -> rows of combinations containing it,
+            metric -> rows sorted by the metric (made on first query of the metric and kept).
+        The result frame itself is available as frame attribute and must not be changed.
+    """
+    def __init__(self, res: pd.DataFrame, col_links: Optional[dict] = None):
+        """
+        Parameters
+        ----------
+        res
+            Result of calculate_dependence() (or a filtered part of it)
+        col_links
+            col_links of model data, used to find members of combinations made by construct_partial_combs().
+            Defaults to the segments of res
+        """
+        self.frame = res
+        self._names = res.index.to_numpy()
+        self._positions = pd.Index(res.index)
+        self._orders = dict()
+
+        # rows of every base_col in the order of the result
+        codes, values = pd.factorize(res['base_col'].astype(object), sort=False)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        self._by_base = {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)}
+
+        # rows of combinations containing every segment
+        known = set(col_links) if col_links is not None else set(res.index)
+        containing = dict()
+        is_comb = res.index.astype(str).str.contains('_AND_', regex=False)
+        for position in np.flatnonzero(is_comb):
+            name, base_col = self._names[position], res['base_col'].iat[position]
+            if isinstance(base_col, str) and base_col.startswith('['):
+                # construct_combs_up_to(): base_col is a json array of members
+                members = json.loads(base_col)
+            else:
+                members = [m for m in name.split('_AND_') if m in known]
+            for member in members:
+                containing.setdefault(member, list()).append(position)
+        self._containing = {member: np.array(rows, dtype=np.int64) for member, rows in containing.items()}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def base_cols(self) -> list:
+        return list(self._by_base)
+
+    def _rows(self, positions: np.ndarray) -> pd.DataFrame:
+        return self.frame.iloc[positions]
+
+    def _order(self, metric: str) -> dict:
+        """ Rows sorted by the metric (ascending and descending, NaN last, ties in the order of the result),
+            sorted values and ranks of rows in both orders
+        """
+        if metric not in self._orders:
+            if metric not in self.frame.columns:
+                raise ValueError(f'Unknown metric: {metric}, it must be a column of calculate_dependence() result')
+            values = self.frame[metric].to_numpy(dtype=float)
+            metric_order = {'n_valid': int((~np.isnan(values)).sum())}
+            for key, sort_values in [('ascending', values), ('descending', -values)]:
+                order = np.argsort(sort_values, kind='stable')
+                ranks = np.empty(len(order), dtype=np.int64)
+                ranks[order] = np.arange(len(order))
+                metric_order[key] = {'order': order, 'ranks': ranks}
+            metric_order['values'] = values[metric_order['ascending']['order']]
+            self._orders[metric] = metric_order
+        return self._orders[metric]
+
+    def base_positions(self, base_col: str) -> np.ndarray:
+        return self._by_base.get(base_col, np.empty(0, dtype=np.int64))
+
+    def base(self, base_col: str) -> pd.DataFrame:
+        """ Rows of segments of the base feature (or of combinations with this base_col)
+        """
+        return self._rows(self.base_positions(base_col))
+
+    def base_segments(self, base_col: str) -> list:
+        return self._names[self.base_positions(base_col)].tolist()
+
+    def containing(self, segment: str) -> pd.DataFrame:
+        """ Rows of combinations containing the segment
+        """
+        return self._rows(self._containing.get(segment, np.empty(0, dtype=np.int64)))
+
+    def sorted_positions(self, metric: str, ascending: bool = True, base_col: Optional[str] = None) -> np.ndarray:
+        """ Positions of rows sorted by the metric (NaN values last), only rows of base_col if it is set
+        """
+        metric_order = self._order(metric)
+        order = metric_order['ascending' if ascending else 'descending']
+        if base_col is None:
+            return order['order']
+        positions = self.base_positions(base_col)
+        return positions[np.argsort(order['ranks'][positions], kind='stable')]
+
+    def sorted_segments(self, metric: str, ascending: bool = True, base_col: Optional[str] = None) -> list:
+        return self._names[self.sorted_positions(metric, ascending, base_col)].tolist()
+
+    def top(self, metric: str, n: int = 10, ascending: bool = False, base_col: Optional[str] = None) -> pd.DataFrame:
+        """ n rows with the highest (or the lowest if ascending) values of the metric
+        """
+        return self._rows(self.sorted_positions(metric, ascending, base_col)[:n])
+
+    def between(self, metric: str, low: Optional[float] = None, high: Optional[float] = None) -> pd.DataFrame:
+        """ Rows with low <= metric <= high (any bound can be omitted), sorted by the metric
+        """
+        metric_order = self._order(metric)
+        values = metric_order['values'][:metric_order['n_valid']]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        end = len(values) if high is None else np.searchsorted(values, high, side='right')
+        return self._rows(metric_order['ascending']['order'][start:end])
+
+    def loc(self, segments: Iterable[str]) -> pd.DataFrame:
+        """ Rows of segments by names, KeyError if some of them are not in the result
+        """
+        segments = list(segments)
+        positions = self._positions.get_indexer(segments)
+        if (positions < 0).any():
+            missing = [s for s, p in zip(segments, positions) if p < 0]
+            raise KeyError(f'Segments not found in the result: {missing}')
+        return self._rows(positions)
@@ -0,0 +1,148 @@
+""" Model data in shared memory for parallel workers.
+
+    Binary features matrix, target, weights and numeric columns of raw data are copied to shared memory blocks once,
+    worker processes attach to them without copying, so sending model data to workers costs no serialization:
+        with dmd.to_shared_memory() as shared:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(work, [shared] * n_tasks))
+
+        def work(shared):
+            model_data = shared.attach()
+            ...
+"""
+from multiprocessing import shared_memory
+import pickle
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from data_fast_insights import BinaryDependenceModelData
+
+
+class SharedModelData:
+    """ Picklable handle of model data in shared memory, made by BinaryDependenceModelData.to_shared_memory().
+
+        The process that made the handle owns shared memory blocks: it must call unlink()
+        (or use the handle as a context manager) when workers are done.
+    """
+    def __init__(self, model_data: 'BinaryDependenceModelData'):
+        segments = model_data.get_segment_names()
+        arrays = {'features': model_data.data[segments].to_numpy(),
+                  'y': model_data.data[model_data.y_name].to_numpy(),
+                  'y_binary': model_data.data[model_data.y_binary_name].to_numpy()}
+        if model_data.weights is not None:
+            arrays['weights'] = model_data.weights.to_numpy()
+        # numeric raw columns are shared as well (one block of rows "column x object" per dtype),
+        # other raw columns (categories, strings) and attributes are pickled to shared memory once
+        base_data = model_data.base_data
+        numeric = [col for col, dtype in base_data.dtypes.items()
+                   if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM']
+        base_groups = dict()
+        for col in numeric:
+            base_groups.setdefault('base_' + base_data[col].dtype.str, list()).append(col)
+        attrs = {k: v for k, v in model_data.__dict__.items()
+                 if k not in ('data', 'weights', 'base_data', 'profiler', '_shared_handle', '_drill_down_cache')}
+        arrays['state'] = np.frombuffer(pickle.dumps({'attrs': attrs, 'index': model_data.data.index,
+                                                      'segments': segments, 'cls': type(model_data),
+                                                      'base_rest': base_data.drop(columns=numeric),
+                                                      'base_columns': list(base_data.columns),
+                                                      'base_groups': base_groups}),
+                                        dtype=np.uint8)
+
+        self._blocks = dict()
+        self.specs = dict()
+        try:
+            for key, array in arrays.items():
+                self._share(key, array.shape, array.dtype)[...] = array
+            for key, cols in base_groups.items():
+                shared = self._share(key, (len(cols), base_data.shape[0]), base_data[cols[0]].dtype)
+                for i, col in enumerate(cols):
+                    shared[i] = base_data[col].to_numpy()
+        except BaseException:
+            self.unlink()
+            raise
+        self._owner = True
+
+    def _share(self, key: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """ New shared memory block as an array to fill
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self._blocks[key] = block
+        self.specs[key] = {'name': block.name, 'shape': shape, 'dtype': dtype.str}
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def __getstate__(self):
+        # only names of shared memory blocks are sent to workers
+        return {'specs': self.specs}
+
+    def __setstate__(self, state):
+        self.specs = state['specs']
+        self._blocks = dict()
+        self._owner = False
+
+    def __enter__(self) -> 'SharedModelData':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.unlink()
+
+    def _array(self, key: str) -> np.ndarray:
+        if key not in self._blocks:
+            self._blocks[key] = shared_memory.SharedMemory(name=self.specs[key]['name'])
+        spec = self.specs[key]
+        array = np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=self._blocks[key].buf)
+        # shared data must not be changed by one of the workers
+        array.flags.writeable = False
+        return array
+
+    def attach(self) -> 'BinaryDependenceModelData':
+        """ Model data using shared arrays without copying them (non-numeric raw columns and other attributes
+            are unpickled). Binary features and raw data are read-only;
+            new features (e.g. combinations) are added to the local copy of data only.
+        """
+        state = pickle.loads(self._array('state').tobytes())
+        model_data = state['cls']._from_state(state['attrs'])
+        base_index = state['base_rest'].index
+        columns = {col: state['base_rest'][col] for col in state['base_rest'].columns}
+        for key, cols in state['base_groups'].items():
+            shared = self._array(key)
+            for i, col in enumerate(cols):
+                columns[col] = pd.Series(shared[i], index=base_index, name=col, copy=False)
+        # concatenation of series keeps a block per column, so shared columns are not copied
+        model_data.base_data = pd.concat([columns[col] for col in state['base_columns']], axis=1, copy=False) \
+            if columns else state['base_rest']
+        model_data._set_data_arrays(state['index'], state['segments'], self._array('features'),
+                                    self._array('y'), self._array('y_binary'))
+        model_data.weights = pd.Series(self._array('weights'), index=state['index']) if 'weights' in self.specs \
+            else None
+        # shared memory blocks must stay open while model data uses them
+        model_data._shared_handle = self
+        return model_data
+
+    def close(self) -> None:
+        """ Close shared memory blocks in this process
+        """
+        blocks = self._blocks
+        self._blocks = dict()
+        for block in blocks.values():
+            _close(block)
+
+    def unlink(self) -> None:
+        """ Free shared memory blocks (only in the process that made the handle)
+        """
+        blocks = self._blocks
+        self._blocks = dict()
+        for block in blocks.values():
+            _close(block)
+            if getattr(self, '_owner', True):
+                block.unlink()
+
+
+def _close(block: shared_memory.SharedMemory) -> None:
+    try:
+        block.close()
+    except BufferError:
+        # arrays of attached model data still use the block, it is closed when they are deleted
+        pass
@@ -1,4 +1,12 @@
 from ._binning import make_bins, get_breaks
-from ._modelling import calculate_dependence, compare_intervals
+from ._bins_cache import BinsCache, set_bins_cache, get_bins_cache
+from ._modelling import calculate_dependence, calculate_dependence_sweep, compare_intervals, get_base_info
+from ._significance import calculate_significance
+from ._distributed import calculate_dependence_partitioned
+from ._drift import compare_drift, freeze_model_data
+from ._drill_down import calculate_drill_down
 
-__all__ = ['make_bins', 'get_breaks', 'calculate_dependence', 'compare_intervals']
+__all__ = ['make_bins', 'get_breaks', 'calculate_dependence', 'calculate_dependence_sweep', 'compare_intervals',
+           'get_base_info', 'calculate_significance', 'calculate_dependence_partitioned',
+           'BinsCache', 'set_bins_cache', 'get_bins_cache', 'compare_drift', 'freeze_model_data',
+           'calculate_drill_down']
@@ -1,24 +1,38 @@
-from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import TYPE_CHECKING, Optional
 import warnings
 
-import scorecardpy as sc
+from data_fast_insights.profiling import profiled
+from ._bins_cache import BinsCache, get_bins_cache
 
 if TYPE_CHECKING:
     from data_fast_insights import BinaryDependenceModelData
 
 
-def make_bins(model_data: 'BinaryDependenceModelData', manual_breaks: dict = None) -> dict:
+@profiled('make_bins')
+def make_bins(model_data: 'BinaryDependenceModelData', manual_breaks: dict = None,
+              cache: Optional[BinsCache] = None, n_threads: int = 1) -> dict:
     """ Make bins for numeric variables of model_data, optimizing for Information Value
         based on created binary target
 
     Parameters
     ----------
     model_data
+        If model_data has row weights (weight_col), binning is made on the rows resampled
+        proportionally to their weights (scorecardpy binning doesn't support weights),
+        so number of rows passed to binning equals number of rows in model_data
     manual_breaks
         Info about features that need to be separated into predefined intervals.
         If this argument is set,
             function won't calculate intervals for it and will use passed values as breaks instead.
         Format: {feature_name: [break1, break2]}
+    cache
+        BinsCache to take bins from (and to store new bins to) instead of rerunning binning on the same data.
+        Defaults to the cache set by set_bins_cache() (no caching if it is not set)
+    n_threads
+        If more than 1, numeric columns are binned separately in a thread pool
+        (same bins as binning all columns at once)
 
     Returns
     -------
@@ -32,11 +46,60 @@ def make_bins(model_data: 'BinaryDependenceModelData', manual_breaks: dict = Non
         warnings.warn(
             "Features in model_data seem to be already converted to binary format, binning might be futile")
     dt = model_data.base_data[model_data.num_cols].join(model_data.data[model_data.y_binary_name])
-    kwargs = {'dt': dt, 'y': model_data.y_binary_name}
+    if model_data.weights is not None:
+        dt = dt.sample(n=dt.shape[0], replace=True, weights=model_data.weights, random_state=0)
+
+    cache = get_bins_cache() if cache is None else cache
+    if cache is None:
+        return _woebin(dt, model_data.y_binary_name, manual_breaks, n_threads)
+
+    keys = cache.make_keys(dt, model_data.y_binary_name, manual_breaks)
+    if not cache.per_column:
+        bins = cache.get(keys[None])
+        if bins is None:
+            bins = _woebin(dt, model_data.y_binary_name, manual_breaks, n_threads)
+            cache.put(keys[None], bins)
+        return bins
+
+    bins = {col: cache.get(key) for col, key in keys.items()}
+    missing = [col for col, col_bins in bins.items() if col_bins is None]
+    if missing:
+        if isinstance(manual_breaks, dict):
+            manual_breaks = {col: breaks for col, breaks in manual_breaks.items() if col in missing}
+        new_bins = _woebin(dt[missing + [model_data.y_binary_name]], model_data.y_binary_name, manual_breaks,
+                           n_threads)
+        for col in missing:
+            # columns without bins (e.g. excluded by binning) are not cached
+            bins[col] = new_bins.get(col)
+            if bins[col] is not None:
+                cache.put(keys[col], bins[col])
+    return {col: col_bins for col, col_bins in bins.items() if col_bins is not None}
+
+
+def _woebin(dt, y_name: str, manual_breaks: dict = None, n_threads: int = 1) -> dict:
+    # scorecardpy (and matplotlib, statsmodels it imports) is loaded only when binning is run,
+    # so using precomputed or cached bins doesn't pay for its import
+    import scorecardpy as sc
+
+    kwargs = {'dt': dt, 'y': y_name}
     # TODO: manual breaks don't work exactly as expected. It there are no values in the interval,
     #  break would not be created
     if manual_breaks is not None and isinstance(manual_breaks, dict):
         kwargs['breaks_list'] = manual_breaks
+    columns = [col for col in dt.columns if col != y_name]
+    if n_threads > 1 and len(columns) > 1:
+        # every column is binned independently, so binning columns separately gives the same bins
+        def bin_column(col):
+            col_kwargs = dict(kwargs, dt=dt[[col, y_name]], no_cores=1)
+            if 'breaks_list' in kwargs:
+                col_kwargs['breaks_list'] = {c: b for c, b in kwargs['breaks_list'].items() if c == col} or None
+            return sc.woebin(**col_kwargs)
+
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            return {col: col_bins for parts in executor.map(bin_column, columns) for col, col_bins in parts.items()}
+    if (os.cpu_count() or 1) < 2:
+        # scorecardpy picks cpu_count() - 1 processes by default, which is 0 on a single-CPU machine
+        kwargs['no_cores'] = 1
     bins = sc.woebin(**kwargs)
 
     # Adjusting bins manually (rounding for representation)
@@ -0,0 +1,143 @@
+from functools import lru_cache
+import hashlib
+from importlib import metadata
+import json
+import os
+import pickle
+from typing import Optional
+
+import pandas as pd
+
+_default_cache = {'cache': None}
+
+
+def set_bins_cache(cache: Optional['BinsCache']) -> None:
+    """ Set cache used by make_bins() when its cache argument is not set (None to disable caching)
+    """
+    _default_cache['cache'] = cache
+
+
+def get_bins_cache() -> Optional['BinsCache']:
+    return _default_cache['cache']
+
+
+@lru_cache(maxsize=None)
+def _scorecardpy_version() -> str:
+    # version is read from package metadata, without importing scorecardpy
+    try:
+        return metadata.version('scorecardpy')
+    except metadata.PackageNotFoundError:
+        import scorecardpy as sc
+        return sc.__version__
+
+
+def _hash_series(series: pd.Series) -> bytes:
+    return pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes()
+
+
+class BinsCache:
+    """ On-disk cache of make_bins() results with LRU eviction.
+
+        Key of cached bins is a hash of the numeric columns, the binary target, manual_breaks
+        and the binning parameters (scorecardpy version), so changed data never gets stale bins.
+    """
+    def __init__(self, path: str, max_size_mb: float = 1024, per_column: bool = False):
+        """
+        Parameters
+        ----------
+        path
+            Directory of the cache, it is created if needed
+        max_size_mb
+            Max size of the cache. Least recently used entries are removed when it is exceeded
+        per_column
+            If True, bins of every numeric column are cached separately,
+            so changing one column (or adding a new one) rebins only this column.
+            Otherwise bins of all columns are cached as one entry
+        """
+        self.path = path
+        self.max_size_mb = max_size_mb
+        self.per_column = per_column
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def make_keys(self, dt, y_name: str, manual_breaks: Optional[dict] = None) -> dict:
+        """ Cache keys of binning data
+
+        Parameters
+        ----------
+        dt
+            DataFrame passed to binning: numeric columns and the binary target
+        y_name
+            Name of the binary target
+        manual_breaks
+
+        Returns
+        -------
+        dict
+            {column: key} if per_column, otherwise {None: key}
+        """
+        manual_breaks = manual_breaks if isinstance(manual_breaks, dict) else dict()
+        common = hashlib.blake2b(digest_size=16)
+        common.update(_scorecardpy_version().encode())
+        common.update(_hash_series(dt[y_name]))
+        columns = sorted(c for c in dt.columns if c != y_name)
+
+        keys = dict()
+        for col in columns:
+            col_hash = common.copy()
+            col_hash.update(json.dumps([str(col), str(dt[col].dtype), manual_breaks.get(col)], default=str).encode())
+            col_hash.update(_hash_series(dt[col]))
+            keys[col] = col_hash.hexdigest()
+        if self.per_column:
+            return keys
+        return {None: hashlib.blake2b(json.dumps(keys).encode(), digest_size=16).hexdigest()}
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + '.pkl')
+
+    def get(self, key: str):
+        """ Cached value or None. Access time of the entry is updated for LRU eviction
+        """
+        file = self._file(key)
+        try:
+            with open(file, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        os.utime(file)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value) -> None:
+        # writing to a temporary file first, so other processes never read a partially written entry
+        tmp_file = self._file(key) + f'.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(tmp_file, self._file(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = list()
+        for name in os.listdir(self.path):
+            if name.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        size = sum(e[1] for e in entries)
+        for _, entry_size, name in sorted(entries):
+            if size <= self.max_size_mb * 2 ** 20:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def clear(self) -> None:
+        for name in os.listdir(self.path):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.path, name))
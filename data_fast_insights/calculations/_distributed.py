@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_fast_insights import BinaryDependenceModelData
+from data_fast_insights._arrow_input import is_arrow_input, arrow_to_pandas, read_parquet
+from ._modelling import _segment_statistics, _dependence_frame
+
+
+def _read_partition(partition, columns: list) -> pd.DataFrame:
+    """ Only model columns of a partition: DataFrame, pyarrow Table, Polars DataFrame or path of Parquet data
+    """
+    if isinstance(partition, pd.DataFrame):
+        return partition[[c for c in columns if c in partition.columns]]
+    if is_arrow_input(partition):
+        return arrow_to_pandas(partition, columns)
+    if isinstance(partition, (str, os.PathLike)):
+        return read_parquet(os.fspath(partition), columns)
+    raise TypeError('Partitions must be DataFrames, pyarrow Tables, Polars DataFrames or paths of Parquet data')
+
+
+def _partition_profile(partition, spec: dict) -> dict:
+    """ First pass: target and weights (for the global threshold) and info about features of a partition
+    """
+    part = _read_partition(partition, spec['columns'])
+    return {'y': part[spec['y_name']].to_numpy(),
+            'weights': None if spec['weight_col'] is None else part[spec['weight_col']].to_numpy(),
+            'cats': {col: pd.Series(part[col].unique()) for col in spec['cat_cols']},
+            'nums': {col: (part[col].min(), part[col].max(), part[col].count()) for col in spec['num_cols']}}
+
+
+def _partition_statistics(partition, spec: dict) -> dict:
+    """ Second pass: segment statistics of a partition converted with global bins and threshold
+    """
+    part = _read_partition(partition, spec['columns'])
+    # the threshold is fixed, so y_type only defines the binary target: "y < y_pivot" marks low rows.
+    # Binary target is a threshold of 1 with inverted rows, so partitions with one target value are supported
+    binary = spec['y_type'] == 'binary'
+    model_data = BinaryDependenceModelData(part, spec['y_name'], spec['cat_cols'], spec['num_cols'], y_type='mean',
+                                           exclude_zero_var=False, weight_col=spec['weight_col'],
+                                           y_is_sum=spec['y_is_sum'], y_pivot=1 if binary else spec['y_pivot'])
+    model_data.convert_to_binary(bins=spec['bins'])
+
+    segments = model_data.get_segment_names()
+    is_low = model_data.data[model_data.y_binary_name].to_numpy().astype(bool)
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    weights = np.ones(y.shape[0]) if model_data.weights is None else model_data.weights.to_numpy(dtype=float)
+    sums = _segment_statistics(model_data.data[segments].to_numpy(), ~is_low if binary else is_low,
+                               np.where(has_y, y, 0.0), has_y, weights)
+    return {'segments': segments, 'sums': sums}
+
+
+def _tree_reduce(items: list, merge):
+    """ Merge items pairwise in rounds (log2(n) rounds instead of a sequential chain)
+    """
+    while len(items) > 1:
+        items = [merge(items[i], items[i + 1]) if i + 1 < len(items) else items[i] for i in range(0, len(items), 2)]
+    return items[0]
+
+
+def _merge_statistics(a: dict, b: dict) -> dict:
+    return {key: a[key] + b[key] for key in a}
+
+
+def calculate_dependence_partitioned(partitions: Iterable,
+                                     y_name: str,
+                                     cat_cols: Optional[Iterable[str]] = None,
+                                     num_cols: Optional[Iterable[str]] = None,
+                                     bins: Optional[dict] = None,
+                                     n_jobs: Optional[int] = None,
+                                     compact: bool = False,
+                                     **kwargs) -> pd.DataFrame:
+    """ Calculate dependence on target for data split into partitions, using several processes of one machine.
+
+        Every partition is converted to binary features in a worker process with the same bins and target threshold,
+        workers return per-segment sums, which are merged into the result of calculate_dependence().
+        Result is the same as calculate_dependence() on model data built on all partitions
+        (up to floating point rounding of target sums), while only one partition per worker is kept in memory.
+
+    Parameters
+    ----------
+    partitions
+        Iterable of DataFrames, pyarrow Tables, Polars DataFrames or paths of Parquet data (pyarrow is required).
+        Only y_name, weight_col, cat_cols and num_cols columns are used (and read from Parquet).
+        Paths are preferable for many partitions, since workers read them without sending data between processes
+    y_name, cat_cols, num_cols
+        See BinaryDependenceModelData
+    bins
+        Bins of all numeric columns (see make_bins(), e.g. made on a sample of all data)
+    n_jobs
+        Number of worker processes, defaults to the number of CPUs. If 1, partitions are processed in this process
+    compact
+        See calculate_dependence()
+    kwargs
+        Other BinaryDependenceModelData arguments: y_type, y_quantile, y_pivot, weight_col, y_is_sum, exclude_zero_var.
+        Target threshold is calculated on all partitions
+
+    Returns
+    -------
+    pd.DataFrame
+        See calculate_dependence()
+    """
+    partitions = list(partitions)
+    if not partitions:
+        raise ValueError('partitions must not be empty')
+    if kwargs.get('sample') is not None:
+        raise ValueError('sample is not supported for partitioned data')
+    cat_cols = set(cat_cols) if cat_cols is not None else set()
+    num_cols = set(num_cols) if num_cols is not None else set()
+    if num_cols and bins is None:
+        raise ValueError('bins of numeric columns must be set (e.g. made with make_bins() on a sample of data)')
+    weight_col = kwargs.pop('weight_col', None)
+    exclude_zero_var = kwargs.pop('exclude_zero_var', True)
+    spec = {'y_name': y_name, 'weight_col': weight_col, 'y_is_sum': kwargs.pop('y_is_sum', False),
+            'y_type': kwargs.pop('y_type', 'quantile'), 'cat_cols': list(cat_cols), 'num_cols': list(num_cols),
+            'columns': [c for c in [y_name, weight_col, *cat_cols, *num_cols] if c is not None]}
+
+    n_jobs = (os.cpu_count() or 1) if n_jobs is None else n_jobs
+    executor = ProcessPoolExecutor(max_workers=min(n_jobs, len(partitions))) if n_jobs > 1 else None
+    try:
+        run = executor.map if executor is not None else map
+        profiles = list(run(_partition_profile, partitions, [spec] * len(partitions)))
+
+        # Global threshold: model data of the target (and weights) of all partitions
+        target = {y_name: np.concatenate([p['y'] for p in profiles])}
+        if weight_col is not None:
+            target[weight_col] = np.concatenate([p['weights'] for p in profiles])
+        target_data = BinaryDependenceModelData(pd.DataFrame(target), y_name, y_type=spec['y_type'],
+                                                weight_col=weight_col, y_is_sum=spec['y_is_sum'], **kwargs)
+
+        # Same checks and features order as in model data built on all partitions
+        global_cats = {col: pd.concat([p['cats'][col] for p in profiles], ignore_index=True).unique()
+                       for col in cat_cols}
+        base_ranges = dict()
+        for col in num_cols:
+            mins = [p['nums'][col][0] for p in profiles if p['nums'][col][2] > 0]
+            maxs = [p['nums'][col][1] for p in profiles if p['nums'][col][2] > 0]
+            base_ranges[col] = [min(mins), max(maxs)] if mins else [np.nan, np.nan]
+        if exclude_zero_var:
+            for cat in [cat for cat in cat_cols if pd.Series(global_cats[cat]).nunique() < 2]:
+                cat_cols.remove(cat)
+                logging.warning(f"{cat} feature was removed before the analysis, because it has < 2 unique values")
+            count = {col: sum(p['nums'][col][2] for p in profiles) for col in num_cols}
+            for num in [num for num in num_cols if count[num] > 1 and base_ranges[num][0] == base_ranges[num][1]]:
+                num_cols.remove(num)
+                logging.warning(f"{num} feature was removed before the analysis, because it has zero variance")
+
+        col_links = dict()
+        for col in cat_cols:
+            for val in global_cats[col]:
+                col_links.setdefault(col + '_' + str(val), col)
+        for col in num_cols:
+            for bin_ in bins[col]['bin']:
+                col_links.setdefault(col + '_missing' if bin_ == 'missing' else col + '_' + bin_, col)
+        segments = list(col_links)
+        positions = {segment: i for i, segment in enumerate(segments)}
+
+        spec.update({'cat_cols': list(cat_cols), 'num_cols': list(num_cols),
+                     'columns': [c for c in [y_name, weight_col, *cat_cols, *num_cols] if c is not None],
+                     'bins': {col: bins[col] for col in num_cols}, 'y_pivot': target_data.y_pivot})
+        aligned = list()
+        for part in run(_partition_statistics, partitions, [spec] * len(partitions)):
+            # segments of a partition are a subset of all segments (e.g. some categories are missing)
+            index = np.array([positions[segment] for segment in part['segments']], dtype=np.int64)
+            sums = dict(part['sums'])
+            for key in ['total_sum', 'low_sum', 'y_count', 'y_sum']:
+                sums[key] = np.zeros(len(segments))
+                sums[key][index] = part['sums'][key]
+            aligned.append(sums)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    sums = _tree_reduce(aligned, _merge_statistics)
+    # totals are taken from all target values, same as in calculate_dependence()
+    y = target_data.data[y_name].to_numpy(dtype=float)
+    weights = np.ones(y.shape[0]) if target_data.weights is None else target_data.weights.to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    sums['n_total'] = weights.sum()
+    y_total_mean = (weights * np.where(has_y, y, 0.0)).sum() / (weights * has_y).sum()
+    return _dependence_frame(segments, sums, y_total_mean, weight_col is not None, col_links, bins,
+                             base_ranges, global_cats, None, compact)
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+from data_fast_insights import BinaryDependenceModelData
+from data_fast_insights.profiling import profiled
+from ._modelling import _segment_statistics
+
+# shares of segments missing in one of the datasets are clipped to it, so PSI and IV stay finite
+_EPS = 1e-6
+
+SORT_COLUMNS = ('psi', 'feature_psi', 'iv_delta', 'perc_of_total_delta', 'high_perc_delta', 'y_mean_delta')
+
+
+def freeze_model_data(baseline: BinaryDependenceModelData, data, n_threads: int = 1,
+                      **kwargs) -> BinaryDependenceModelData:
+    """ Model data of new data converted with the bins and the target threshold of baseline model data,
+        so its segments are directly comparable with the baseline segments
+
+    Parameters
+    ----------
+    baseline
+        Converted model data (see convert_to_binary())
+    data
+        New data with the same columns: DataFrame, pyarrow Table or Polars DataFrame
+    n_threads
+        See convert_to_binary()
+    kwargs
+        Other BinaryDependenceModelData arguments for new data (e.g. y_is_sum).
+        Features, weights and the target threshold are taken from baseline
+
+    Returns
+    -------
+    BinaryDependenceModelData
+    """
+    if not baseline.is_data_converted:
+        raise ValueError('baseline model data must be converted to binary features (see convert_to_binary())')
+    if baseline.num_cols and not baseline.bins:
+        raise ValueError('baseline model data has numeric columns, but no bins')
+    y_type = baseline.target_processing_attrs['y_type']
+    if y_type != 'binary':
+        # the threshold of baseline is fixed, y_type only keeps the name of the binary target
+        kwargs['y_pivot'] = baseline.y_pivot
+    current = BinaryDependenceModelData(data, baseline.y_name, baseline.cat_cols, baseline.num_cols, y_type=y_type,
+                                        exclude_zero_var=False, weight_col=baseline.weight_col, **kwargs)
+    current.convert_to_binary(bins=baseline.bins, n_threads=n_threads)
+    return current
+
+
+def _aligned_statistics(model_data: BinaryDependenceModelData, segments: list) -> dict:
+    """ Segment statistics of model data in the order of segments (zeros for segments missing in model data)
+    """
+    own_segments = [s for s in model_data.get_segment_names() if s in segments]
+    is_low = (model_data.data[model_data.y_binary_name] == 1).to_numpy()
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    weights = np.ones(y.shape[0]) if model_data.weights is None else model_data.weights.to_numpy(dtype=float)
+    sums = _segment_statistics(model_data.data[own_segments].to_numpy(), is_low, np.where(has_y, y, 0.0), has_y,
+                               weights)
+    positions = pd.Index(segments).get_indexer(own_segments)
+    for key in ['total_sum', 'low_sum', 'y_count', 'y_sum']:
+        values = np.zeros(len(segments))
+        values[positions] = sums[key]
+        sums[key] = values
+    sums['low_total'] = (weights * is_low).sum()
+    return sums
+
+
+def _information_value(sums: dict) -> np.ndarray:
+    # IV of every segment against the binary target: (dist_high - dist_low) * ln(dist_high / dist_low)
+    high_total = sums['n_total'] - sums['low_total']
+    dist_low = np.clip(sums['low_sum'] / sums['low_total'], _EPS, None) if sums['low_total'] else \
+        np.full(len(sums['low_sum']), _EPS)
+    dist_high = np.clip((sums['total_sum'] - sums['low_sum']) / high_total, _EPS, None) if high_total else \
+        np.full(len(sums['low_sum']), _EPS)
+    return (dist_high - dist_low) * np.log(dist_high / dist_low)
+
+
+@profiled('compare_drift', model_arg='baseline')
+def compare_drift(baseline: BinaryDependenceModelData,
+                  current,
+                  sort_by: str = 'psi',
+                  n_threads: int = 1,
+                  **kwargs) -> pd.DataFrame:
+    """ Compare segments of new data with segments of baseline data: how their sizes and target shifted.
+        New data is converted with the bins and the target threshold of baseline (see freeze_model_data()),
+        all metrics are calculated for all segments at once
+
+    Parameters
+    ----------
+    baseline
+        Converted model data of baseline data (e.g. last month)
+    current
+        New data (e.g. this week): DataFrame, pyarrow Table, Polars DataFrame,
+        or model data made by freeze_model_data()
+    sort_by
+        Column to rank segments by, descending by absolute value: "psi", "feature_psi", "iv_delta",
+        "perc_of_total_delta", "high_perc_delta" or "y_mean_delta"
+    n_threads
+        See convert_to_binary()
+    kwargs
+        Other BinaryDependenceModelData arguments for new data, see freeze_model_data()
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per segment of base features (combinations are not compared), ranked by sort_by. Columns:
+            base_col - parent feature of the segment
+            perc_of_total_base, perc_of_total_current, perc_of_total_delta - segment share of data, in percent
+            high_perc_base, high_perc_current, high_perc_delta - share of objects not lower than
+                the (baseline) target threshold, in percent
+            y_mean_base, y_mean_current, y_mean_delta - target mean of the segment
+            psi - population stability index of the segment:
+                (share_current - share_base) * ln(share_current / share_base)
+            feature_psi - PSI of the parent feature (sum of psi of its segments)
+            iv_base, iv_current, iv_delta - information value of the segment against the binary target
+        Shares of segments missing in one of the datasets are clipped to 1e-6 in psi and iv
+    """
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f'Unknown sort_by {sort_by}, please use one of the following: {SORT_COLUMNS}')
+    if not isinstance(current, BinaryDependenceModelData):
+        current = freeze_model_data(baseline, current, n_threads=n_threads, **kwargs)
+
+    base_cols = set(baseline.cat_cols) | set(baseline.num_cols)
+    col_links = {s: c for s, c in baseline.col_links.items() if c in base_cols}
+    # segments that appear only in new data (e.g. new categories) are compared with empty baseline segments
+    col_links.update({s: c for s, c in current.col_links.items() if c in base_cols and s not in col_links})
+    segments = list(col_links)
+
+    stats = {'base': _aligned_statistics(baseline, segments), 'current': _aligned_statistics(current, segments)}
+    res = pd.DataFrame({'base_col': list(col_links.values())}, index=segments)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = dict()
+        for name, sums in stats.items():
+            shares[name] = sums['total_sum'] / sums['n_total']
+            res[f'perc_of_total_{name}'] = shares[name] * 100
+            res[f'high_perc_{name}'] = (1 - sums['low_sum'] / sums['total_sum']) * 100
+            res[f'y_mean_{name}'] = sums['y_sum'] / sums['y_count']
+        for metric in ['perc_of_total', 'high_perc', 'y_mean']:
+            res[f'{metric}_delta'] = res[f'{metric}_current'] - res[f'{metric}_base']
+
+        share_base, share_current = np.clip(shares['base'], _EPS, None), np.clip(shares['current'], _EPS, None)
+        res['psi'] = (share_current - share_base) * np.log(share_current / share_base)
+        res['feature_psi'] = res.groupby('base_col')['psi'].transform('sum')
+        res['iv_base'] = _information_value(stats['base'])
+        res['iv_current'] = _information_value(stats['current'])
+        res['iv_delta'] = res['iv_current'] - res['iv_base']
+
+    order = np.argsort(-np.nan_to_num(res[sort_by].abs().to_numpy(), nan=-np.inf), kind='stable')
+    return res.iloc[order]
@@ -0,0 +1,80 @@
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+import pandas as pd
+
+from ._modelling import calculate_dependence
+
+if TYPE_CHECKING:
+    from data_fast_insights import BinaryDependenceModelData
+
+
+def _cached_dependence(model_data: 'BinaryDependenceModelData', path: tuple) -> pd.DataFrame:
+    """ calculate_dependence() of the drilled down model data, cached in the drill down cache of the root model data
+    """
+    if not path:
+        cache = getattr(model_data, '_drill_down_cache', None)
+        if cache is None:
+            cache = model_data._drill_down_cache = dict()
+        # the root entry doesn't keep a reference to the model data itself
+        entry = cache.setdefault(path, dict())
+        node = model_data
+    else:
+        node = model_data.drill_down(path)
+        entry = model_data._drill_down_cache[path]
+    if entry.get('res') is None:
+        res = calculate_dependence(model_data=node)
+        # segments without objects in the drilled down data (e.g. other values of the drilled feature)
+        entry['res'] = res[res['total_sum'] > 0]
+    return entry['res']
+
+
+def calculate_drill_down(model_data: 'BinaryDependenceModelData',
+                         path: Optional[Union[str, Iterable[str]]] = None,
+                         depth: int = 1,
+                         top: int = 3,
+                         sort_by: str = 'group_importance',
+                         min_total: float = 1) -> dict:
+    """ Drill down into segments recursively: calculate dependence inside the top segments,
+        then inside the top segments of every result, and so on up to depth levels.
+        See BinaryDependenceModelData.drill_down(): data is not copied, results are cached per path
+
+    Parameters
+    ----------
+    model_data
+    path
+        Segment or list of segments to start from, defaults to all data of model_data
+    depth
+        Number of levels to drill down from path (0 - only the result of path itself)
+    top
+        Number of segments to drill down into on every level
+    sort_by
+        Column of calculate_dependence() result to choose top segments by (descending)
+    min_total
+        Min total_sum of a segment to drill down into it
+
+    Returns
+    -------
+    dict
+        {path: calculate_dependence() result inside the path}, path is a tuple of segments.
+        Metrics are relative to the objects of the path (share of them, their target mean),
+        segments having no objects in the path are not included
+    """
+    path = tuple() if path is None else ((path,) if isinstance(path, str) else tuple(path))
+    results = dict()
+    levels = [path]
+    for level in range(depth + 1):
+        next_levels = list()
+        for node_path in levels:
+            res = _cached_dependence(model_data, node_path)
+            results[node_path] = res
+            if level == depth:
+                continue
+            if sort_by not in res.columns:
+                raise ValueError(f'Unknown sort_by: {sort_by}, it must be a column of calculate_dependence() result')
+            # segments of features already drilled down and segments with all objects don't split the data
+            used_cols = {model_data.col_links.get(s) for s in node_path}
+            candidates = res[(res['total_sum'] >= min_total) & (res['perc_of_total'] < 100)
+                             & ~res.index.isin(node_path) & ~res['base_col'].isin(used_cols)]
+            next_levels += [node_path + (s,) for s in candidates[sort_by].astype(float).nlargest(top).index]
+        levels = next_levels
+    return results
@@ -1,22 +1,84 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
+from statistics import NormalDist
 
 import numpy as np
 import pandas as pd
 
-from data_fast_insights import utils
+from data_fast_insights import utils, kernels
+from data_fast_insights.profiling import profiled
+from data_fast_insights.utils.calc_utils import _weighted_stat
 
 
 if TYPE_CHECKING:
     from data_fast_insights import BinaryDependenceModelData
 
 
-def calculate_dependence(model_data: 'BinaryDependenceModelData' = None) -> pd.DataFrame:
+def _sampling_intervals(model_data: 'BinaryDependenceModelData', features: np.ndarray, is_low: np.ndarray,
+                        y: np.ndarray, has_y: np.ndarray, confidence: float) -> dict:
+    """ Confidence intervals of low_perc, target_delta_perc and group_importance estimated on a stratified sample.
+        Variances of ratio estimates are calculated with linearization, strata are values of the binary target.
+    """
+    y_binary = model_data.data[model_data.y_binary_name].to_numpy()
+    n_rows = model_data.sampling['n_rows']
+    y_mean = model_data.sampling['y_mean']
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    strata = list()
+    for stratum, sizes in model_data.sampling['strata'].items():
+        in_stratum = y_binary == stratum
+        n_h = sizes['sample_size']
+        count, low, y_count, y_sum, y_sq_sum = kernels.segment_sums(
+            features, [in_stratum, in_stratum & is_low, in_stratum & has_y, in_stratum * y, in_stratum * y ** 2])
+        strata.append({'weight': sizes['n_rows'] / n_h,
+                       'factor': sizes['n_rows'] ** 2 * (1 - n_h / sizes['n_rows']) / n_h if n_h > 1 else 0.0,
+                       'n': n_h, 'count': count, 'low': low, 'y_count': y_count, 'y_sum': y_sum, 'y_sq_sum': y_sq_sum})
+
+    def ratio_variance(numerator, denominator, sq_sum, cross_sum, den_sq_sum):
+        # Var of sum(w*v*x) / sum(w*u*x) where numerator, denominator, sums of squares are given by stratum
+        num_total = sum(h['weight'] * h[numerator] for h in strata)
+        den_total = sum(h['weight'] * h[denominator] for h in strata)
+        ratio = num_total / den_total
+        variance = 0
+        for h in strata:
+            z_sum = (h[numerator] - ratio * h[denominator]) / den_total
+            z_sq_sum = (h[sq_sum] - 2 * ratio * h[cross_sum] + ratio ** 2 * h[den_sq_sum]) / den_total ** 2
+            variance = variance + h['factor'] * (z_sq_sum - z_sum ** 2 / h['n']) / max(h['n'] - 1, 1)
+        return ratio, variance
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low_ratio, low_var = ratio_variance('low', 'count', 'low', 'low', 'count')
+        y_ratio, y_var = ratio_variance('y_sum', 'y_count', 'y_sq_sum', 'y_sum', 'y_count')
+        share = sum(h['weight'] * h['count'] for h in strata) / n_rows
+        share_var = sum(h['factor'] * (h['count'] - h['count'] ** 2 / h['n']) / max(h['n'] - 1, 1)
+                        for h in strata) / n_rows ** 2
+
+        low_se, y_se = np.sqrt(np.clip(low_var, 0, None)), np.sqrt(np.clip(y_var, 0, None))
+        delta_bounds = [((y_ratio - z * y_se) / y_mean - 1) * 100, ((y_ratio + z * y_se) / y_mean - 1) * 100]
+        importance = share * np.abs(y_ratio - y_mean)
+        importance_se = np.sqrt(np.clip((y_ratio - y_mean) ** 2 * share_var + share ** 2 * y_var, 0, None))
+    return {'low_perc_ci_low': np.clip(low_ratio - z * low_se, 0, 1) * 100,
+            'low_perc_ci_high': np.clip(low_ratio + z * low_se, 0, 1) * 100,
+            'target_delta_perc_ci_low': np.fmin(*delta_bounds),
+            'target_delta_perc_ci_high': np.fmax(*delta_bounds),
+            'group_importance_ci_low': np.clip(importance - z * importance_se, 0, None),
+            'group_importance_ci_high': importance + z * importance_se}
+
+
+@profiled('calculate_dependence')
+def calculate_dependence(model_data: 'BinaryDependenceModelData' = None, confidence: float = 0.95,
+                         compact: bool = False) -> pd.DataFrame:
     """ Calculate dependence on target for features in model_data
 
     Parameters
     ----------
     model_data
-        If not set, return a dataframe with a row of default values
+        If not set, return a dataframe with a row of default values.
+        If model_data has row weights (weight_col), all sums and means below are weighted
+    confidence
+        Confidence level of intervals, only used if model_data is a sample (see "sample" argument of model data)
+    compact
+        If True, base_breaks, base_range and base_cats columns (same for all segments of a base feature)
+        are not added, and base_col is categorical. This info can be taken from get_base_info(model_data)
 
     Returns
     -------
@@ -43,6 +105,9 @@ def calculate_dependence(model_data: 'BinaryDependenceModelData' = None) -> pd.D
             base_breaks - chosen breaks of intervals of the parent feature (if parent feature is numeric)
             base_range - min and max values of the parent feature (if parent feature is numeric)
             base_cats - all possible categories of the parent feature (if parent feature is categorical)
+        If model_data is a sample, metrics are estimates for all data and there are additional columns
+            <metric>_ci_low, <metric>_ci_high - bounds of confidence intervals
+                for low_perc, target_delta_perc, group_importance
     """
     if model_data is None:
         return pd.DataFrame.from_dict(
@@ -55,51 +120,209 @@ def calculate_dependence(model_data: 'BinaryDependenceModelData' = None) -> pd.D
     #     warnings.warn("""Features in model_data seem to not be converted to binary format yet,
     #     calculate_dependence() might return wrong output.
     #     """)
-    df_features = model_data.data.drop(model_data.y_name, 1)
-    res_total = pd.DataFrame(
-        df_features.sum(axis=0), columns=['total_sum']).sort_values(by='total_sum', ascending=False)
+    segments = model_data.get_segment_names()
+    features = model_data.data[segments].to_numpy()
+    is_low = (model_data.data[model_data.y_binary_name] == 1).to_numpy()
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    y = np.where(has_y, y, 0.0)
+
+    weights = np.ones(y.shape[0]) if model_data.weights is None else model_data.weights.to_numpy(dtype=float)
+    sums = _segment_statistics(features, is_low, y, has_y, weights)
+    if model_data.sampling is not None:
+        y_total_mean = model_data.sampling['y_mean']
+    else:
+        y_total_mean = sums['y_total_sum'] / sums['y_total_count']
+
+    intervals = None
+    if model_data.sampling is not None:
+        intervals = _sampling_intervals(model_data, features, is_low, y, has_y, confidence)
+    base_cols = set(model_data.col_links.values())
+    base_ranges = {col: [model_data.base_data[col].min(), model_data.base_data[col].max()]
+                   for col in model_data.num_cols if col in base_cols}
+    base_cats = {col: model_data.base_data[col].unique() for col in model_data.cat_cols if col in base_cols}
+    weighted = model_data.weights is not None and not getattr(model_data, 'weights_are_row_mask', False)
+    return _dependence_frame(segments, sums, y_total_mean, weighted,
+                             model_data.col_links, model_data.bins, base_ranges, base_cats, intervals, compact)
+
+
+def _segment_statistics(features: np.ndarray, is_low: np.ndarray, y: np.ndarray, has_y: np.ndarray,
+                        weights: np.ndarray) -> dict:
+    """ Sufficient statistics of calculate_dependence(): per-segment sums and totals.
+        Statistics of several parts of data can be added up to get statistics of all data.
+    """
+    total_sum, low_sum, y_count, y_sum = kernels.segment_sums(
+        features, [weights, weights * is_low, weights * has_y, weights * y])
+    return {'total_sum': total_sum, 'low_sum': low_sum, 'y_count': y_count, 'y_sum': y_sum,
+            'n_total': weights.sum(), 'y_total_sum': (weights * y).sum(), 'y_total_count': (weights * has_y).sum()}
+
+
+def _base_info(base_cols: Iterable[str], bins: dict, base_ranges: dict, base_cats: dict) -> pd.DataFrame:
+    """ Info about base features: breaks and range of numeric features, categories of categorical features
+    """
+    info = {'base_breaks': dict(), 'base_range': dict(), 'base_cats': dict()}
+    for col in base_cols:
+        if col in base_ranges:
+            info['base_breaks'][col] = bins[col]['breaks'].tolist()
+            info['base_range'][col] = str(base_ranges[col])
+            info['base_cats'][col] = ''
+        elif col in base_cats:
+            info['base_breaks'][col] = ''
+            info['base_range'][col] = ''
+            info['base_cats'][col] = base_cats[col]
+    return pd.DataFrame({info_col: pd.Series(values, dtype=object) for info_col, values in info.items()},
+                        columns=list(info))
+
+
+def get_base_info(model_data: 'BinaryDependenceModelData') -> pd.DataFrame:
+    """ Info about base features of model data: the same as base_* columns of calculate_dependence() result,
+        one row per base feature. Meant to be used with compact results of calculate_dependence()
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by base feature
+        Columns description:
+            base_breaks - chosen breaks of intervals of the feature (if feature is numeric)
+            base_range - min and max values of the feature (if feature is numeric)
+            base_cats - all possible categories of the feature (if feature is categorical)
+    """
+    base_ranges = {col: [model_data.base_data[col].min(), model_data.base_data[col].max()]
+                   for col in model_data.num_cols}
+    base_cats = {col: model_data.base_data[col].unique() for col in model_data.cat_cols}
+    return _base_info([*model_data.cat_cols, *model_data.num_cols], model_data.bins, base_ranges, base_cats)
+
+
+def _dependence_frame(segments: list, sums: dict, y_total_mean: float, weighted: bool, col_links: dict,
+                      bins: dict, base_ranges: dict, base_cats: dict, intervals: dict = None,
+                      compact: bool = False) -> pd.DataFrame:
+    """ Make calculate_dependence() result from segment statistics (see _segment_statistics)
+
+    Parameters
+    ----------
+    segments
+        Segment names
+    sums
+        Segment statistics
+    y_total_mean
+    weighted
+        If False, total_sum and low_sum are integer
+    col_links, bins
+        Attributes of model data
+    base_ranges
+        Min and max value of every numeric column
+    base_cats
+        Unique values of every categorical column
+    intervals
+        Confidence intervals columns (for sampled model data)
+    compact
+        See calculate_dependence()
+    """
+    total_sum, low_sum, n_total = sums['total_sum'], sums['low_sum'], sums['n_total']
+    if not weighted:
+        total_sum, low_sum = total_sum.round().astype(np.int64), low_sum.round().astype(np.int64)
 
-    df_low = df_features[df_features[model_data.y_binary_name] == 1].drop(model_data.y_binary_name, 1).copy()
-    res_low = pd.DataFrame(df_low.sum(axis=0), columns=['low_sum'])
-    res_low = pd.merge(res_total, res_low, left_index=True, right_index=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_segment_mean = sums['y_sum'] / sums['y_count']
+    res_low = pd.DataFrame({'total_sum': total_sum, 'low_sum': low_sum}, index=segments)
     res_low['low_perc'] = (res_low['low_sum'] / res_low['total_sum']) * 100
     res_low['high_perc'] = 100 - res_low['low_perc']
-    res_low['perc_of_total'] = (res_low['total_sum'] / model_data.data.shape[0]) * 100
-    res_low['target_delta_perc'] = np.nan
-    res_low['group_importance'] = np.nan
+    res_low['perc_of_total'] = (res_low['total_sum'] / n_total) * 100
+    res_low['target_delta_perc'] = ((y_segment_mean / y_total_mean) - 1) * 100
+    res_low['group_importance'] = (total_sum / n_total) * np.abs(y_segment_mean - y_total_mean)
 
-    res_low['base_col'] = ''
-    res_low['base_breaks'] = ''
-    res_low['base_range'] = ''
+    # Info about base features is repeated for all their segments, so it's collected once per base feature
+    base_col = np.array([col_links.get(segment, '') for segment in segments], dtype=object)
+    base_info = _base_info(set(base_col), bins, base_ranges, base_cats)
+    if compact:
+        res_low['base_col'] = pd.Categorical(base_col)
+    else:
+        res_low['base_col'] = base_col
+        for info_col, values in base_info.items():
+            values = values.to_dict()
+            column = np.empty(len(segments), dtype=object)
+            for i, col in enumerate(base_col):
+                column[i] = values.get(col, '')
+            res_low[info_col] = column
     # res_low['base_central_value'] = np.nan
     # res_low['base_central_value'] = res_low['base_central_value'].astype(object)
     # res_low['base_min'] = np.nan
     # res_low['base_max'] = np.nan
-    res_low['base_cats'] = ''
-
-    # TODO: change from .iterrows() to faster type of iterations (e.g. zip() on series?)
-    for i, row in res_low.iterrows():
-        res_low.at[i, 'target_delta_perc'] = ((model_data.data[model_data.data[i] == 1][model_data.y_name].mean() /
-                                              model_data.data[model_data.y_name].mean()) - 1) * 100
-        res_low.at[i, 'group_importance'] = \
-            (model_data.data[model_data.data[i] == 1].shape[0] / model_data.data.shape[0]) * \
-            abs(model_data.data[model_data.data[i] == 1][model_data.y_name].mean() -
-                model_data.data[model_data.y_name].mean())
-
-        if i in model_data.col_links:
-            base_col = model_data.col_links[i]
-            res_low.at[i, 'base_col'] = base_col
-            # res_low.at[i, 'base_central_value'] = model_data.base_data[base_col].__getattribute__(
-            #     utils.choose_central_tendency_metric(base_col, model_data))()
-            if base_col in model_data.num_cols:
-                res_low.at[i, 'base_range'] = str([model_data.base_data[base_col].min(),
-                                                   model_data.base_data[base_col].max()])
-                res_low.at[i, 'base_breaks'] = model_data.bins[base_col]['breaks'].tolist()
-            elif base_col in model_data.cat_cols:
-                res_low.at[i, 'base_cats'] = model_data.base_data[base_col].unique()
+    for col, values in (intervals or dict()).items():
+        res_low[col] = values
+    res_low = res_low.sort_values(by='total_sum', ascending=False)
     res_low = res_low.sort_values(by='low_perc', ascending=False)
     return res_low
 
+
+@profiled('calculate_dependence_sweep')
+def calculate_dependence_sweep(model_data: 'BinaryDependenceModelData',
+                               y_quantiles: Iterable[float] = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+                               ) -> pd.DataFrame:
+    """ Calculate low_sum / low_perc of every segment for several target thresholds at once.
+
+        Target is sorted once, so rows lower than each threshold form a prefix of sorted rows.
+        Segment sums are accumulated between consecutive thresholds,
+        which costs one pass over the data instead of a separate experiment for every quantile.
+
+    Parameters
+    ----------
+    model_data
+        Model data with features already converted to binary format
+    y_quantiles
+        Quantiles of the target (numbers between 0 and 1) to be used as thresholds ("y_pivot")
+
+    Returns
+    -------
+    pd.DataFrame
+        Long-format DataFrame indexed by segment name, one row per segment and threshold
+        Columns description:
+            y_quantile - quantile used as a threshold
+            y_pivot - target value of this quantile
+            total_sum, low_sum, low_perc, high_perc - same as in calculate_dependence()
+                for the binary target built with this threshold
+    """
+    if model_data.target_processing_attrs['y_type'] == 'binary':
+        raise ValueError("Threshold sweep is not applicable to binary targets")
+    quantiles = np.sort(np.asarray(list(y_quantiles), dtype=float))
+    if quantiles.size == 0 or ((quantiles < 0) | (quantiles > 1)).any():
+        raise ValueError('y_quantiles must be a non-empty iterable of numbers between 0 and 1')
+
+    segments = model_data.get_segment_names()
+    features = model_data.data[segments].to_numpy()
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    pivots = np.asarray(model_data.get_target_quantiles(quantiles, model_data.data[model_data.y_name]))
+    weights = None if model_data.weights is None else model_data.weights.to_numpy(dtype=float)
+
+    # NaN targets are sorted last and never fall below any threshold
+    order = np.argsort(y, kind='stable')
+    bounds = np.searchsorted(y[order], pivots, side='left')
+
+    total_sums = features.sum(axis=0) if weights is None else kernels.segment_sums(features, [weights])[0]
+    low_sums = np.empty((quantiles.size, len(segments)), dtype=total_sums.dtype)
+    running = np.zeros(len(segments), dtype=total_sums.dtype)
+    start = 0
+    for i, stop in enumerate(bounds):
+        rows = order[start:stop]
+        if weights is None:
+            running = running + features[rows].sum(axis=0)
+        else:
+            running = running + kernels.segment_sums(features[rows], [weights[rows]])[0]
+        low_sums[i] = running
+        start = stop
+
+    res = pd.DataFrame({
+        'y_quantile': np.repeat(quantiles, len(segments)),
+        'y_pivot': np.repeat(pivots, len(segments)),
+        'total_sum': np.tile(total_sums, quantiles.size),
+        'low_sum': low_sums.ravel()},
+        index=pd.Index(np.tile(np.asarray(segments, dtype=object), quantiles.size)))
+    res['low_perc'] = (res['low_sum'] / res['total_sum']) * 100
+    res['high_perc'] = 100 - res['low_perc']
+    return res
+
+
+@profiled('compare_intervals')
 def compare_intervals(selected: str, model_data: 'BinaryDependenceModelData') -> pd.DataFrame:
     """ Compare how changing certain values to other interval of same feature would affect the target.
 
@@ -125,13 +348,15 @@ def compare_intervals(selected: str, model_data: 'BinaryDependenceModelData') ->
             new_<metric_name> - metric of the new segment
             new_base_<metric_name> - metric of the parent feature of the new segment
             total_target_change_perc - how much this substitution changes total target value (on all data), in percent
+        If model data has row weights (weight_col, sample, drill_down()), all metrics and sums are weighted
     """
     # TODO: make it so model_data.data and model_data.base_data don't have to have same points on same indices
     #  or make it explicit.
-
     if selected not in model_data.data.columns:
         raise ValueError(f"'{selected}' feature not found in model_data.data;"
                          + " make sure you pass a binary segment name, not the original feature name")
+    if model_data.weights is not None:
+        return _compare_intervals_weighted(selected, model_data)
 
     sel_interval_indices = model_data.data.loc[model_data.data[selected] == 1].index
     base_col = model_data.col_links[selected]
@@ -173,3 +398,39 @@ def compare_intervals(selected: str, model_data: 'BinaryDependenceModelData') ->
         current_comp_data['total_target_change_perc'] = total_target_increase * 100
         comp_df = comp_df.append(pd.DataFrame(current_comp_data, index=[index]))
     return comp_df
+
+
+def _compare_intervals_weighted(selected: str, model_data: 'BinaryDependenceModelData') -> pd.DataFrame:
+    """ compare_intervals() for model data with row weights: every row is repeated "weight" times
+    """
+    weights = model_data.weights.to_numpy(dtype=float)
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    weighted_y = np.where(has_y, weights * y, 0.0)
+    base_col = model_data.col_links[selected]
+    base_values = model_data.base_data.loc[model_data.data.index, base_col].reset_index(drop=True)
+    pd_metrics_attr = utils.choose_central_tendency_metric(base_col, model_data)
+
+    is_selected = (model_data.data[selected] == 1).to_numpy()
+    y_total = weighted_y.sum()
+    # target of the selected rows is replaced by the target mean of the other segment
+    y_rest = y_total - weighted_y[is_selected].sum()
+    rows = list()
+    for compare_to in [b for b, base in model_data.col_links.items() if base == base_col and b != selected]:
+        in_other = (model_data.data[compare_to] == 1).to_numpy()
+        other_y_mean = weighted_y[in_other].sum() / (weights * has_y)[in_other].sum()
+        new_metric = _weighted_stat(base_values[in_other], weights[in_other], pd_metrics_attr)
+        substituted = base_values.copy()
+        substituted[is_selected] = new_metric
+        rows.append({'old_col': selected,
+                     'old_' + pd_metrics_attr: _weighted_stat(base_values[is_selected], weights[is_selected],
+                                                              pd_metrics_attr),
+                     'old_base_' + pd_metrics_attr: _weighted_stat(base_values, weights, pd_metrics_attr),
+                     'new_col': compare_to,
+                     'new_' + pd_metrics_attr: new_metric,
+                     'new_base_' + pd_metrics_attr: _weighted_stat(substituted, weights, pd_metrics_attr),
+                     'total_target_change_perc':
+                         ((y_rest + other_y_mean * weights[is_selected].sum()) / y_total - 1) * 100})
+    columns = ['old_col', 'old_' + pd_metrics_attr, 'old_base_' + pd_metrics_attr, 'new_col',
+               'new_' + pd_metrics_attr, 'new_base_' + pd_metrics_attr, 'total_target_change_perc']
+    return pd.DataFrame(rows, columns=columns)
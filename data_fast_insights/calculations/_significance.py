@@ -0,0 +1,164 @@
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_fast_insights import kernels
+from data_fast_insights.profiling import profiled
+
+if TYPE_CHECKING:
+    from data_fast_insights import BinaryDependenceModelData
+
+
+def _adjust_p_values(p_values: np.ndarray) -> np.ndarray:
+    """ Benjamini-Hochberg adjustment of p-values for multiple comparisons, NaN p-values are ignored
+    """
+    valid = np.flatnonzero(~np.isnan(p_values))
+    order = valid[np.argsort(p_values[valid])]
+    ranked = p_values[order] * valid.shape[0] / np.arange(1, valid.shape[0] + 1)
+    adjusted = np.full_like(p_values, np.nan)
+    adjusted[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1)
+    return adjusted
+
+
+def _permutation_batch(features, is_low, y, has_y, observed, seed, batch_size):
+    """ Count permutations of the target in which segment deviations are at least as high as observed ones
+    """
+    rng = np.random.default_rng(seed)
+    low_dev, y_dev, y_total_mean, low_share = observed
+    exceed_low = np.zeros(features.shape[1])
+    exceed_y = np.zeros(features.shape[1])
+    permutations = [rng.permutation(y.shape[0]) for _ in range(batch_size)]
+    sums = kernels.segment_sums(features, [is_low[p] for p in permutations]
+                                + [has_y[p] for p in permutations]
+                                + [y[p] for p in permutations])
+    total_sum = features.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(batch_size):
+            exceed_low += np.abs(sums[i] - total_sum * low_share) >= low_dev
+            exceed_y += np.abs(sums[2 * batch_size + i] / sums[batch_size + i] - y_total_mean) >= y_dev
+    return exceed_low, exceed_y
+
+
+def _bootstrap_batch(features, is_low, y, has_y, weights, sampling_weights, seed, batch_size):
+    """ Metrics of every segment on Poisson bootstrap replicates (replicates x segments arrays)
+    """
+    rng = np.random.default_rng(seed)
+    if sampling_weights:
+        replicates = [rng.poisson(1, y.shape[0]) * weights for _ in range(batch_size)]
+    else:
+        replicates = [rng.poisson(weights) for _ in range(batch_size)]
+    sums = np.array(kernels.segment_sums(features, replicates
+                                         + [r * is_low for r in replicates]
+                                         + [r * has_y for r in replicates]
+                                         + [r * y for r in replicates])).reshape(4, batch_size, features.shape[1])
+    total_sum, low_sum, y_count, y_sum = sums
+    n_total = np.array([r.sum() for r in replicates])[:, None]
+    y_total_mean = np.array([(r * y).sum() / (r * has_y).sum() for r in replicates])[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_segment_mean = y_sum / y_count
+        return {'low_perc': low_sum / total_sum * 100,
+                'target_delta_perc': (y_segment_mean / y_total_mean - 1) * 100,
+                'group_importance': total_sum / n_total * np.abs(y_segment_mean - y_total_mean)}
+
+
+@profiled('calculate_significance')
+def calculate_significance(model_data: 'BinaryDependenceModelData',
+                           method: str = 'bootstrap',
+                           n_resamples: int = 1000,
+                           confidence: float = 0.95,
+                           random_state: int = 0,
+                           n_jobs: int = 1,
+                           batch_size: int = 20) -> pd.DataFrame:
+    """ Estimate whether segment metrics of calculate_dependence() differ from the total ones not just by chance.
+        All segments are processed together: resamples are made in batches
+        and segment sums of a batch are calculated with one matrix product.
+
+    Parameters
+    ----------
+    model_data
+        Model data with features already converted to binary format
+    method
+        "bootstrap" - Poisson bootstrap: every row gets a random Poisson(1) weight
+            (Poisson(weight) for pre-aggregated rows), percentile confidence intervals of metrics are returned.
+        "permutation" - binary target is permuted against the segments,
+            p-values of deviations of low_perc and target_delta_perc from the total ones are returned.
+            Not supported for model data with row weights.
+    n_resamples
+        Number of bootstrap replicates or permutations
+    confidence
+        Confidence level of bootstrap intervals
+    random_state
+        Seed; results do not depend on n_jobs
+    n_jobs
+        Number of threads processing batches of resamples
+    batch_size
+        Number of resamples processed with one matrix product.
+        Memory usage is proportional to batch_size * number of rows
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by segment name
+        Columns description for "bootstrap":
+            <metric>_ci_low, <metric>_ci_high - bounds of confidence intervals
+                for low_perc, target_delta_perc, group_importance
+        Columns description for "permutation":
+            <metric>_p_value - share of permutations in which segment metric deviates from the total one
+                at least as much as the observed metric, for low_perc and target_delta_perc
+            <metric>_p_value_adj - p-value adjusted for multiple comparisons (Benjamini-Hochberg)
+    """
+    if method not in ('bootstrap', 'permutation'):
+        raise ValueError('Unknown method, please use one of the following: "bootstrap", "permutation"')
+    if method == 'permutation' and model_data.weights is not None:
+        raise ValueError('Permutation method is not supported for model data with row weights')
+    for name, value in [('n_resamples', n_resamples), ('batch_size', batch_size)]:
+        if not isinstance(value, (int, np.integer)) or isinstance(value, bool) or value < 1:
+            raise ValueError(f'{name} must be a positive integer, got {value!r}')
+
+    segments = model_data.get_segment_names()
+    features = model_data.data[segments].to_numpy()
+    is_low = (model_data.data[model_data.y_binary_name] == 1).to_numpy().astype(float)
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = (~np.isnan(y)).astype(float)
+    y = np.where(has_y > 0, y, 0.0)
+
+    batch_sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        batch_sizes.append(n_resamples % batch_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(batch_sizes))
+
+    if method == 'permutation':
+        total_sum = features.sum(axis=0)
+        low_sum, y_count, y_sum = kernels.segment_sums(features, [is_low, has_y, y])
+        low_share = is_low.mean()
+        y_total_mean = y.sum() / has_y.sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            observed = (np.abs(low_sum - total_sum * low_share), np.abs(y_sum / y_count - y_total_mean),
+                        y_total_mean, low_share)
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            batches = list(executor.map(
+                lambda args: _permutation_batch(features, is_low, y, has_y, observed, *args), zip(seeds, batch_sizes)))
+        res = pd.DataFrame(index=segments)
+        for i, metric in enumerate(['low_perc', 'target_delta_perc']):
+            p_values = np.where(np.isnan(observed[i]), np.nan,
+                                (1 + sum(b[i] for b in batches)) / (1 + n_resamples))
+            res[metric + '_p_value'] = p_values
+            res[metric + '_p_value_adj'] = _adjust_p_values(p_values)
+        return res
+
+    if model_data.weights is None:
+        weights = np.ones(y.shape[0])
+    else:
+        weights = model_data.weights.to_numpy(dtype=float)
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        batches = list(executor.map(
+            lambda args: _bootstrap_batch(features, is_low, y, has_y, weights, model_data.sampling is not None, *args),
+            zip(seeds, batch_sizes)))
+    res = pd.DataFrame(index=segments)
+    for metric in ['low_perc', 'target_delta_perc', 'group_importance']:
+        replicates = np.vstack([b[metric] for b in batches])
+        res[metric + '_ci_low'] = np.nanpercentile(replicates, (1 - confidence) / 2 * 100, axis=0)
+        res[metric + '_ci_high'] = np.nanpercentile(replicates, (1 + confidence) / 2 * 100, axis=0)
+    return res
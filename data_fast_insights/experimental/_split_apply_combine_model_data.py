@@ -1,13 +1,18 @@
 from copy import deepcopy
 from functools import reduce
 import logging
+import numbers
+from typing import Iterable, Optional
 
+import numpy as np
 import pandas as pd
 
 from data_fast_insights import BinaryDependenceModelData
 from data_fast_insights.utils import exclude_zero_var, singular_experiment
 from data_fast_insights.calculations import calculate_dependence
 
+_BASE_ROWS = ('base_col', 'base_breaks', 'base_range', 'base_cats')
+
 
 class SplitApplyCombineModelData(BinaryDependenceModelData):
     # TODO: add checks on every step that data is ready?
@@ -22,7 +27,9 @@ class SplitApplyCombineModelData(BinaryDependenceModelData):
         self.all_features = None
         self.cnt_excluded_by_feat = None
 
+        self.stacked_res = None
         self.total_res = None
+        self.stability_res = None
 
         self.default_calc = calculate_dependence(None)
 
@@ -55,55 +62,121 @@ class SplitApplyCombineModelData(BinaryDependenceModelData):
             params_thresholds = dict()
 
         for p, data in self.exp_data_reports.items():
-            tmp_res = data['res']
+            # results are filtered from the unfiltered ones, so filtering can be repeated with other thresholds
+            tmp_res = data.setdefault('res_unfiltered', data['res'])
 
             for param, value in params_thresholds.items():
                 tmp_res = tmp_res[tmp_res[param] > value]
 
             self.exp_data_reports[p]['res'] = tmp_res.T
 
+        # stacked results of the previous filter are rebuilt by reduce() and stability()
+        self.stacked_res = None
         self.all_features = reduce(
             lambda x, y: set(x) | set(y), [r['res'].columns for r in self.exp_data_reports.values()])
 
     def fill_defaults(self):
-        self.cnt_excluded_by_feat = {f: 0 for f in self.all_features}
-        for p, data in self.exp_data_reports.items():
-            merging = data['res'].copy()
-
-            for diff in set(self.all_features).difference(set(merging.columns)):
-                # TODO inplace renaming
-                default_ = self.default_calc
-                default_.columns = [diff]
-
-                merging = pd.merge(merging, default_, left_index=True, right_index=True)
-                self.cnt_excluded_by_feat[diff] += 1
-            self.exp_data_reports[p]['res'] = merging
+        """ Stack results of all experiments into one array: experiment x segment x metric.
+            Segments missing in an experiment get default (zero) values and are masked out of the mean in reduce()
+        """
+        reports = list(self.exp_data_reports.values())
+        features = sorted(self.all_features)
+        base_rows = [r for r in self.default_calc.index if r in _BASE_ROWS]
+        metrics = [r for r in self.default_calc.index if r not in base_rows]
+        for data in reports:
+            metrics += [r for r in data['res'].index if r not in base_rows and r not in metrics]
+
+        values = np.zeros((len(reports), len(features), len(metrics)))
+        present = np.zeros((len(reports), len(features)), dtype=bool)
+        base_cols = list()
+        for i, data in enumerate(reports):
+            # one reindex per experiment: segments are matched by position in features, not merged one by one
+            res = data['res']
+            positions = pd.Index(features).get_indexer(res.columns)
+            values[i, positions] = res.reindex(metrics).T.to_numpy(dtype=float)
+            present[i, positions] = True
+            if 'base_col' in res.index:
+                base_cols.append(res.loc['base_col'])
+
+        base_col = pd.concat(base_cols) if base_cols else pd.Series(dtype=object)
+        self.stacked_res = {'partitions': list(self.exp_data_reports), 'features': features, 'metrics': metrics,
+                            'values': values, 'present': present,
+                            'base_col': base_col[~base_col.index.duplicated()].reindex(features)}
+        self.cnt_excluded_by_feat = dict(zip(features, (len(reports) - present.sum(axis=0)).tolist()))
 
     def reduce(self):
-        total_res = reduce(
-            lambda x, y: x + y,
-            [r['res'].drop(
-                ['base_col', 'base_breaks', 'base_range', 'base_cats'],
-                0) for r in self.exp_data_reports.values()])
-
-        for f in total_res.columns:
-            """Since we have added zeros for features that are missing,
-            we must only divide by amount of experiments in which the feature is present
-            """
-            total_res[f] /= (len(self.exp_data_reports) - self.cnt_excluded_by_feat[f])
-        total_res = total_res.T
-
-        # Adding number of experiments feature was in
-        total_res = pd.merge(total_res,
-                             pd.DataFrame.from_dict(
-                                 self.cnt_excluded_by_feat, orient='index', columns=['number_of_experiments']),
-                             left_index=True,
-                             right_index=True)
-        total_res['number_of_experiments'] = len(self.exp_data_reports) - total_res['number_of_experiments']
-
-        # fixing base_col
-        for i, row in total_res.iterrows():
-            if i in self.col_links:
-                total_res.at[i, 'base_col'] = self.col_links[i]
+        if self.stacked_res is None:
+            self.fill_defaults()
+        stacked = self.stacked_res
+
+        # Since segments are missing in some experiments (their values are zeros),
+        # the sum is divided only by amount of experiments in which the segment is present
+        number_of_experiments = stacked['present'].sum(axis=0)
+        total_res = pd.DataFrame(stacked['values'].sum(axis=0) / number_of_experiments[:, None],
+                                 index=stacked['features'], columns=stacked['metrics'])
+        total_res['number_of_experiments'] = number_of_experiments
+        total_res['base_col'] = stacked['base_col'].fillna(pd.Series(self.col_links, dtype=object)).to_numpy()
 
         self.total_res = total_res
+
+    def stability(self,
+                  metrics: Optional[Iterable[str]] = None,
+                  partition_values: Optional[dict] = None) -> pd.DataFrame:
+        """ Stability of segment metrics across experiments (partitions), calculated in one vectorized pass.
+            Only experiments in which the segment is present are used
+
+        Parameters
+        ----------
+        metrics
+            Metrics (columns of calculate_dependence() result) to describe, defaults to all of them
+        partition_values
+            Numeric positions of partitions for the trend slope, {partition: value}.
+            Defaults to the partition values if all of them are numeric (e.g. years), otherwise to their order
+
+        Returns
+        -------
+        pd.DataFrame
+            Long format: one row per segment and metric with columns
+            segment, base_col, metric, number_of_experiments, mean, std, min, max, slope
+            (slope is the least squares trend of the metric per unit of partition value).
+            Result is also stored as stability_res, e.g. consistently bad segments:
+                res.query("metric == 'high_perc' and number_of_experiments >= 5 and max < 40")
+        """
+        if self.stacked_res is None:
+            self.fill_defaults()
+        stacked = self.stacked_res
+        metrics = stacked['metrics'] if metrics is None else list(metrics)
+        unknown = [m for m in metrics if m not in stacked['metrics']]
+        if unknown:
+            raise ValueError(f'Unknown metrics: {unknown}')
+        values = stacked['values'][:, :, [stacked['metrics'].index(m) for m in metrics]]
+        partitions = stacked['partitions']
+        if partition_values is None:
+            numeric = all(isinstance(p, numbers.Number) and not isinstance(p, bool) for p in partitions)
+            partition_values = {p: p if numeric else i for i, p in enumerate(partitions)}
+        x = np.array([partition_values[p] for p in partitions], dtype=float)[:, None, None]
+
+        # experiment x segment x metric, missing segments have zero weight
+        w = stacked['present'][:, :, None].astype(float)
+        n = w.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (w * values).sum(axis=0) / n
+            x_mean = (w * x).sum(axis=0) / n
+            std = np.sqrt((w * (values - mean) ** 2).sum(axis=0) / (n - 1))
+            x_dev = np.where(w > 0, x - x_mean, 0.0)
+            slope = (x_dev * (values - mean)).sum(axis=0) / (x_dev ** 2).sum(axis=0)
+        present = w > 0
+        minimum = np.where(present, values, np.inf).min(axis=0)
+        maximum = np.where(present, values, -np.inf).max(axis=0)
+
+        n_features, n_metrics = mean.shape
+        base_col = stacked['base_col'].fillna(pd.Series(self.col_links, dtype=object)).to_numpy()
+        stability_res = pd.DataFrame({
+            'segment': pd.Categorical(np.repeat(stacked['features'], n_metrics), categories=stacked['features']),
+            'base_col': np.repeat(base_col, n_metrics),
+            'metric': pd.Categorical(np.tile(metrics, n_features), categories=metrics),
+            'number_of_experiments': np.broadcast_to(n, mean.shape).ravel().astype(int),
+            'mean': mean.ravel(), 'std': std.ravel(), 'min': minimum.ravel(), 'max': maximum.ravel(),
+            'slope': slope.ravel()})
+        self.stability_res = stability_res
+        return stability_res
@@ -0,0 +1,165 @@
+""" Kernels for the hot arithmetic of the model: per-segment sums and AND-combinations of binary features.
+
+    Two backends are available:
+        "numpy" - default, no additional dependencies
+        "numba" - JIT-compiled multithreaded loops, requires numba to be installed
+
+    Backend can be selected at runtime:
+        from data_fast_insights import kernels
+        kernels.set_backend('numba')
+        # or temporarily
+        with kernels.use_backend('numba'):
+            res = calc.calculate_dependence(model_data=dmd)
+"""
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+BACKENDS = ('numpy', 'numba')
+
+# Max number of cells of the feature matrix converted to float at once by numpy segment_sums()
+_SUMS_CHUNK_CELLS = 2 ** 24
+
+_state = {'backend': 'numpy', 'numba_kernels': None}
+
+
+def _numpy_segment_sums(features: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    res = np.empty((weights.shape[0], features.shape[1]))
+    chunk_size = max(1, _SUMS_CHUNK_CELLS // max(1, features.shape[0]))
+    for start in range(0, features.shape[1], chunk_size):
+        res[:, start:start + chunk_size] = weights @ features[:, start:start + chunk_size].astype(float)
+    return res
+
+
+def _numpy_and_combine(features: np.ndarray, combs: np.ndarray) -> np.ndarray:
+    res = np.empty((features.shape[0], combs.shape[0]), dtype=np.int64, order='F')
+    for j, comb in enumerate(combs):
+        res[:, j] = np.logical_and.reduce([features[:, i] for i in comb])
+    return res
+
+
+def _compile_numba_kernels() -> dict:
+    """ Compile numba kernels on first use, so importing this module doesn't require numba.
+        Feature matrices are columnar (as pandas stores them),
+        so columns are processed in parallel and every column is scanned once,
+        updating all the sums of the row at the same time.
+    """
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def segment_sums(features, weights_by_row):
+        n_rows, n_features = features.shape
+        n_weights = weights_by_row.shape[1]
+        res = np.zeros((n_weights, n_features))
+        for j in numba.prange(n_features):
+            for i in range(n_rows):
+                if features[i, j]:
+                    for k in range(n_weights):
+                        res[k, j] += weights_by_row[i, k]
+        return res
+
+    @numba.njit(parallel=True, cache=True)
+    def and_combine(features, combs):
+        n_rows = features.shape[0]
+        n_combs, comb_size = combs.shape
+        res = np.empty((n_combs, n_rows), dtype=np.int64)
+        for j in numba.prange(n_combs):
+            for i in range(n_rows):
+                value = 1
+                for k in range(comb_size):
+                    if not features[i, combs[j, k]]:
+                        value = 0
+                        break
+                res[j, i] = value
+        return res.T
+
+    return {'segment_sums': segment_sums, 'and_combine': and_combine}
+
+
+def _get_numba_kernels() -> dict:
+    if _state['numba_kernels'] is None:
+        _state['numba_kernels'] = _compile_numba_kernels()
+    return _state['numba_kernels']
+
+
+def set_backend(name: str, n_threads: Optional[int] = None) -> None:
+    """ Select backend for the kernels
+
+    Parameters
+    ----------
+    name
+        "numpy" or "numba"
+    n_threads
+        Number of threads used by numba backend, defaults to numba settings
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown backend {name}, please use one of the following: {BACKENDS}')
+    if name == 'numba':
+        try:
+            import numba
+        except ImportError:
+            raise ImportError('numba is required for "numba" backend, install it with "pip install numba"')
+        if n_threads is not None:
+            numba.set_num_threads(n_threads)
+    _state['backend'] = name
+
+
+def get_backend() -> str:
+    return _state['backend']
+
+
+@contextmanager
+def use_backend(name: str, n_threads: Optional[int] = None):
+    """ Context manager for using a backend temporarily
+    """
+    previous = get_backend()
+    set_backend(name, n_threads)
+    try:
+        yield
+    finally:
+        _state['backend'] = previous
+
+
+def segment_sums(features: np.ndarray, vectors: list) -> list:
+    """ Sums of every vector (e.g. row weights or target values) over rows of each binary feature.
+
+    Parameters
+    ----------
+    features
+        2D array of binary features, rows x features
+    vectors
+        1D arrays of length equal to the number of rows
+
+    Returns
+    -------
+    list
+        1D arrays of sums, one array (of length equal to the number of features) per vector
+    """
+    weights = np.vstack(vectors).astype(float)
+    if get_backend() == 'numba':
+        res = _get_numba_kernels()['segment_sums'](np.asfortranarray(features), np.ascontiguousarray(weights.T))
+    else:
+        res = _numpy_segment_sums(features, weights)
+    return list(res)
+
+
+def and_combine(features: np.ndarray, combs: np.ndarray) -> np.ndarray:
+    """ Combinations of binary features that equal 1 when all of its members equal 1
+
+    Parameters
+    ----------
+    features
+        2D array of binary features, rows x features
+    combs
+        2D array of column indices of features, combinations x combination size
+
+    Returns
+    -------
+    np.ndarray
+        2D array of combined binary features (0 or 1), rows x combinations
+    """
+    combs = np.asarray(combs, dtype=np.int64).reshape(len(combs), -1)
+    if get_backend() == 'numba':
+        return _get_numba_kernels()['and_combine'](np.asfortranarray(features), combs)
+    return _numpy_and_combine(features, combs)
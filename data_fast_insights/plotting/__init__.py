@@ -1,3 +1,26 @@
-from .essentials import plot_segments_dependence, plot_segments_central_tendency, plot_segments_basic_info
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = ['plot_segments_dependence', 'plot_segments_central_tendency', 'plot_segments_basic_info']
+if TYPE_CHECKING:
+    from .essentials import plot_segments_dependence, plot_segments_central_tendency, plot_segments_basic_info
+    from .report import prepare_report_data, render_report
+
+# matplotlib.pyplot is imported with the first plotting function used, report functions don't import pyplot at all
+_lazy_attributes = {'plot_segments_dependence': '.essentials', 'plot_segments_central_tendency': '.essentials',
+                    'plot_segments_basic_info': '.essentials',
+                    'prepare_report_data': '.report', 'render_report': '.report'}
+
+__all__ = ['plot_segments_dependence', 'plot_segments_central_tendency', 'plot_segments_basic_info',
+           'prepare_report_data', 'render_report']
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_lazy_attributes[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -1,9 +1,10 @@
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING
 
 import matplotlib.pyplot as plt
 import pandas as pd
 
 from data_fast_insights import utils
+from data_fast_insights._segment_results import SegmentResults
 from data_fast_insights.resources.literals_mapping import SHOWCASE_LITERALS_MAPPING
 
 if TYPE_CHECKING:
@@ -31,8 +32,9 @@ def plot_segments_dependence(model_data: 'BinaryDependenceModelData',
     Parameters
     ----------
     model_data
-    res_low_df: pd.DataFrame
+    res_low_df: pd.DataFrame or SegmentResults
         Resulting dataframe of the experiment - output of .calculations.calculate_dependence()
+        (SegmentResults of it is faster for repeated plots)
     base_feature_name: str
     base_feature_rename: str, optional
         What to rename base feature to on the plot
@@ -68,7 +70,10 @@ def plot_segments_dependence(model_data: 'BinaryDependenceModelData',
     # fig = plt.figure()
     if ax is None:
         ax = plt.gca()
-    series = res_low_df[res_low_df['base_col'] == base_feature_name][param_name].copy()
+    if isinstance(res_low_df, SegmentResults):
+        series = res_low_df.base(base_feature_name)[param_name].copy()
+    else:
+        series = res_low_df[res_low_df['base_col'] == base_feature_name][param_name].copy()
 
     # resorting
     feat_names = [k for k, v in model_data.col_links.items() if v == base_feature_name]
@@ -125,7 +130,8 @@ def plot_segments_central_tendency(model_data: 'BinaryDependenceModelData',
                                    unit_name: str = None,
                                    resort: str = 'default',
                                    res_low_df: pd.DataFrame = None,
-                                   ax=None):
+                                   ax=None,
+                                   metrics=None):
     """
 
     Parameters
@@ -152,6 +158,9 @@ def plot_segments_central_tendency(model_data: 'BinaryDependenceModelData',
         Resulting dataframe of the experiment - output of .calculations.calculate_dependence()
         Only required for some sorting methods (see resort argument)
     ax: matplotlib ax, optional
+    metrics: str, float or list, optional
+        "mean", "median", "mode" or a float in (0, 1) for a quantile, or a list of them (one line per metric).
+        Defaults to utils.choose_central_tendency_metric(): mean for target and numeric features, mode for categorical
 
     Returns
     -------
@@ -161,13 +170,14 @@ def plot_segments_central_tendency(model_data: 'BinaryDependenceModelData',
     if ax is None:
         ax = plt.gca()
 
-    pd_metrics_attr = utils.choose_central_tendency_metric(y_name, model_data)
+    if metrics is None:
+        metrics = utils.choose_central_tendency_metric(y_name, model_data)
+    metrics = [metrics] if isinstance(metrics, (str, float)) else list(metrics)
 
     if base_feature_rename:
         ax.set_xlabel(base_feature_rename)
     else:
         ax.set_xlabel(base_feature_name)
-    ax.set_ylabel(y_name + ' ' + pd_metrics_attr)
 
     # resorting
     feat_names = [k for k, v in model_data.col_links.items() if v == base_feature_name]
@@ -175,27 +185,24 @@ def plot_segments_central_tendency(model_data: 'BinaryDependenceModelData',
                                            res_low_df=res_low_df)
     segments = feat_names.copy()
 
-    plot_data = {'x_tick': list(), 'x': list(), 'y': list()}
+    # all metrics of all segments in one grouped aggregation
+    stats = utils.segments_central_tendency(model_data, segments, y_name, metrics)
+    ax.set_ylabel(y_name + ' ' + ', '.join(stats.columns))
+
     is_numeric = base_feature_name in model_data.num_cols
-    for i, segment in enumerate(segments):
-        sel_interval_indices = model_data.data.loc[model_data.data[segment] == 1].index
-
-        tick = utils.get_segment_name_ready_for_plot(is_numeric, base_feature_name, segment, unit_name)
-        plot_data['x_tick'].append(tick)
-        plot_data['x'].append(i)
-        plot_data['y'].append(
-            model_data.base_data.loc[sel_interval_indices, :][y_name].__getattribute__(pd_metrics_attr)())
-
-    if pd_metrics_attr == 'mode' and isinstance(plot_data['y'], Iterable):
-        raise NotImplementedError(
-            "plot_segments_central_tendency is not implemented for mode values / categorical features")
-
-    elif pd_metrics_attr == 'mean':
-        ax.plot(
-            plot_data['x'], plot_data['y'], label=y_name + ' ' + pd_metrics_attr, linestyle='--', marker='o', color='b')
-    else:
-        raise ValueError(f'Unknown pd_metrics_attr: {pd_metrics_attr}.' +
-                         'Check utils.choose_central_tendency_metric for allowed metrics')
+    plot_data = {'x_tick': [utils.get_segment_name_ready_for_plot(is_numeric, base_feature_name, segment, unit_name)
+                            for segment in segments],
+                 'x': list(range(len(segments)))}
+    for i, metric_name in enumerate(stats.columns):
+        y = stats[metric_name].reset_index(drop=True)
+        label = y_name + ' ' + metric_name
+        color = 'b' if i == 0 else None
+        if metric_name == 'mode' and not pd.api.types.is_numeric_dtype(y.infer_objects()):
+            # mode of a categorical feature: categories are plotted on the y axis, segments without values are skipped
+            y = y[y.notna()]
+            ax.plot(y.index, y.astype(str), label=label, linestyle='', marker='o', color=color)
+        else:
+            ax.plot(plot_data['x'], y.astype(float), label=label, linestyle='--', marker='o', color=color)
 
     plt.sca(ax)
     plt.xticks(ticks=plot_data['x'], labels=plot_data['x_tick'], rotation=10)
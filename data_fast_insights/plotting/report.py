@@ -0,0 +1,220 @@
+""" Batch report: basic info plots of many base features, rendered without pyplot global state.
+
+    Plot data of all features is prepared from one result of calculations.calculate_dependence(),
+    then figures are rendered with the object-oriented Agg API, so they can be rendered in parallel processes:
+        render_report(model_data=dmd, res_low_df=res, output='report.html', n_jobs=8)
+"""
+from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from io import BytesIO
+import os
+import re
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+
+from data_fast_insights import utils, kernels
+from data_fast_insights._segment_results import SegmentResults
+
+if TYPE_CHECKING:
+    from data_fast_insights import BinaryDependenceModelData
+
+FORMATS = ('png', 'svg', 'html', 'pdf')
+
+
+def prepare_report_data(model_data: 'BinaryDependenceModelData',
+                        res_low_df: pd.DataFrame,
+                        base_features: Optional[Iterable[str]] = None,
+                        unit_names: Optional[dict] = None,
+                        resort: str = 'default') -> dict:
+    """ Prepare data of basic info plots (see plotting.plot_segments_basic_info) for many base features at once
+
+    Parameters
+    ----------
+    model_data
+    res_low_df
+        Resulting dataframe of calculations.calculate_dependence() or SegmentResults of it
+    base_features
+        Base features to plot, defaults to all features of model data having segments in res_low_df
+    unit_names
+        Unit names of features to add to interval names, {feature: unit_name}
+    resort
+        See plotting.plot_segments_basic_info
+
+    Returns
+    -------
+    dict
+        {base feature: plot data}, plot data is a dict of plain lists (can be sent to other processes)
+    """
+    unit_names = unit_names or dict()
+    frame = res_low_df.frame if isinstance(res_low_df, SegmentResults) else res_low_df
+    segments_by_feature = dict()
+    for segment, base_col in model_data.col_links.items():
+        if base_col in model_data.cat_cols or base_col in model_data.num_cols:
+            segments_by_feature.setdefault(base_col, list()).append(segment)
+    if base_features is None:
+        present = set(frame.index)
+        base_features = [f for f, segments in segments_by_feature.items() if any(s in present for s in segments)]
+    base_features = list(base_features)
+
+    # target means of all plotted segments in one pass over the data
+    all_segments = [s for f in base_features for s in segments_by_feature.get(f, list())]
+    # weighted as in calculate_dependence(), e.g. rows outside a drilled down segment have zero weights
+    y = model_data.data[model_data.y_name].to_numpy(dtype=float)
+    has_y = ~np.isnan(y)
+    weights = np.ones(y.shape[0]) if model_data.weights is None else model_data.weights.to_numpy(dtype=float)
+    y_count, y_sum = kernels.segment_sums(model_data.data[all_segments].to_numpy(),
+                                          [weights * has_y, weights * np.where(has_y, y, 0.0)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_means = dict(zip(all_segments, y_sum / y_count))
+
+    report_data = dict()
+    for feature in base_features:
+        segments = utils.resort_binary_names(feat_names=segments_by_feature.get(feature, list()), by=resort,
+                                             base_feature_name=feature, res_low_df=res_low_df)
+        segments = [s for s in segments if s in frame.index]
+        is_numeric = feature in model_data.num_cols
+        report_data[feature] = {
+            'feature': feature,
+            'y_name': model_data.y_name,
+            'ticks': [utils.get_segment_name_ready_for_plot(is_numeric, feature, s, unit_names.get(feature))
+                      for s in segments],
+            'perc_of_total': frame.loc[segments, 'perc_of_total'].astype(float).tolist(),
+            'high_perc': frame.loc[segments, 'high_perc'].astype(float).tolist(),
+            'y_mean': [float(y_means[s]) for s in segments],
+        }
+    return report_data
+
+
+def draw_basic_info(fig: Figure, plot_data: dict) -> Figure:
+    """ Draw basic info plots of one feature (prepared by prepare_report_data) on a figure, without pyplot
+    """
+    axs = fig.subplots(3, sharex=True)
+    feature = plot_data['feature']
+    x = np.arange(len(plot_data['ticks']))
+
+    for ax, param_name, color, plot_mean in [(axs[0], 'perc_of_total', 'tab:blue', True),
+                                             (axs[1], 'high_perc', 'c', False)]:
+        values = np.asarray(plot_data[param_name])
+        ax.bar(x, values, color=color, width=0.5)
+        if plot_mean and values.size:
+            ax.plot(x, np.full(values.size, values.mean()), color='tab:red')
+        if (values < 0).any() and (values > 0).any():
+            ax.axhline(y=0.0, color='black', linestyle='-')
+    axs[2].plot(x, plot_data['y_mean'], linestyle='--', marker='o', color='b')
+
+    fig.suptitle(feature, fontsize=14)
+    axs[0].set_title(f"{feature}: Size of Segments, %", pad=7, size=10.5)
+    axs[1].set_title(f"{feature}: Share of Objects Better than the Total Mean, by segment, %", pad=7, size=10.5)
+    axs[2].set_title(f"Average {plot_data['y_name']} by {feature} Segments", pad=7, size=10.5)
+    axs[2].set_xlabel(feature)
+    axs[2].set_xticks(x)
+    axs[2].set_xticklabels(plot_data['ticks'], rotation=10)
+    for ax in axs:
+        ax.tick_params(axis='x', which='both', labelsize=9)
+    fig.subplots_adjust(hspace=0.36, bottom=0.2)
+    return fig
+
+
+def _render(args) -> bytes:
+    plot_data, fmt = args
+    fig = Figure(figsize=(10, 5.5))
+    FigureCanvasAgg(fig)
+    draw_basic_info(fig, plot_data)
+    buffer = BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _file_names(features: Iterable[str]) -> dict:
+    """ Unique file names of features: features mapped to the same name (e.g. "a b" and "a/b")
+        get numeric suffixes, compared case-insensitively for case-insensitive file systems
+    """
+    names, used = dict(), set()
+    for feature in features:
+        base = name = re.sub(r'[^\w\-.]+', '_', str(feature))
+        suffix = 1
+        while name.lower() in used:
+            name = f'{base}_{suffix}'
+            suffix += 1
+        used.add(name.lower())
+        names[feature] = name
+    return names
+
+
+def render_report(model_data: 'BinaryDependenceModelData',
+                  res_low_df: pd.DataFrame,
+                  output: str,
+                  fmt: Optional[str] = None,
+                  base_features: Optional[Iterable[str]] = None,
+                  unit_names: Optional[dict] = None,
+                  resort: str = 'default',
+                  n_jobs: int = 1) -> dict:
+    """ Render basic info plots of many base features to files or to a single report
+
+    Parameters
+    ----------
+    model_data
+    res_low_df
+        Resulting dataframe of calculations.calculate_dependence()
+    output
+        Directory for "png" and "svg" formats (one file per feature), path of the report for "html" and "pdf"
+    fmt
+        "png", "svg", "html" or "pdf", defaults to the extension of output ("png" if there is no extension)
+    base_features, unit_names, resort
+        See prepare_report_data()
+    n_jobs
+        Number of processes rendering figures (PDF pages are rendered in this process)
+
+    Returns
+    -------
+    dict
+        {base feature: path of its file} for "png" and "svg", {"report": output} for "html" and "pdf"
+    """
+    if fmt is None:
+        extension = os.path.splitext(output)[1].lstrip('.').lower()
+        fmt = extension if extension in FORMATS else 'png'
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown fmt {fmt}, please use one of the following: {FORMATS}')
+    report_data = prepare_report_data(model_data, res_low_df, base_features, unit_names, resort)
+
+    if fmt == 'pdf':
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        with PdfPages(output) as pdf:
+            for plot_data in report_data.values():
+                fig = Figure(figsize=(10, 5.5))
+                FigureCanvasAgg(fig)
+                pdf.savefig(draw_basic_info(fig, plot_data))
+        return {'report': output}
+
+    image_fmt = 'png' if fmt == 'html' else fmt
+    tasks = [(plot_data, image_fmt) for plot_data in report_data.values()]
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            images = list(executor.map(_render, tasks))
+    else:
+        images = [_render(task) for task in tasks]
+
+    if fmt == 'html':
+        parts = [f'<html><head><meta charset="utf-8"><title>{escape(model_data.y_name)}</title></head><body>']
+        for feature, image in zip(report_data, images):
+            parts.append(f'<h2>{escape(str(feature))}</h2>'
+                         f'<img src="data:image/png;base64,{b64encode(image).decode()}"/>')
+        parts.append('</body></html>')
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(parts))
+        return {'report': output}
+
+    os.makedirs(output, exist_ok=True)
+    paths = dict()
+    file_names = _file_names(report_data)
+    for feature, image in zip(report_data, images):
+        paths[feature] = os.path.join(output, f'{file_names[feature]}.{fmt}')
+        with open(paths[feature], 'wb') as f:
+            f.write(image)
+    return paths
@@ -0,0 +1,171 @@
+""" Instrumentation of model stages: timers, peak memory counters and hooks.
+
+    Every model data object has a profiler that records stages of the model
+    (e.g. make_bins, convert_to_binary, construct_combs_up_to, calculate_dependence):
+        res = calc.calculate_dependence(model_data=dmd)
+        print(dmd.profile_report())
+
+    Hooks (e.g. for metrics exporters) are called with a dict describing every started and finished stage:
+        profiling.add_hook(lambda event: exporter.send(event))  # for all model data objects
+        dmd.profiler.add_hook(my_hook)  # for one object
+"""
+from contextlib import contextmanager
+import functools
+import inspect
+import logging
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_global_hooks = list()
+_config = {'track_memory': False}
+
+
+def add_hook(hook: Callable[[dict], None]) -> None:
+    """ Add hook called on events of all profilers
+    """
+    _global_hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict], None]) -> None:
+    _global_hooks.remove(hook)
+
+
+def set_track_memory(track_memory: bool) -> None:
+    """ Set whether new profilers measure peak memory of stages (with tracemalloc, which slows calculations down)
+    """
+    _config['track_memory'] = track_memory
+
+
+def log_hook(event: dict) -> None:
+    """ Hook that logs finished stages
+    """
+    if event['event'] == 'stage_end':
+        logger.info(f"{event['stage']}: {event['seconds']:.3f} s, rows: {event.get('rows')}, "
+                    + f"segments: {event.get('segments')}, peak memory: {event.get('peak_memory_mb')} MB")
+
+
+class Profiler:
+    """ Records time and peak memory of model stages and passes them to hooks
+    """
+    def __init__(self, track_memory: Optional[bool] = None):
+        self.track_memory = _config['track_memory'] if track_memory is None else track_memory
+        self.records = list()
+        self.hooks = list()
+
+    def __getstate__(self):
+        # hooks might not be picklable, e.g. when model data is sent to worker processes
+        state = self.__dict__.copy()
+        state['hooks'] = list()
+        return state
+
+    def add_hook(self, hook: Callable[[dict], None]) -> None:
+        self.hooks.append(hook)
+
+    def reset(self) -> None:
+        self.records = list()
+
+    def _emit(self, event: dict) -> None:
+        for hook in self.hooks + _global_hooks:
+            hook(event)
+
+    @contextmanager
+    def stage(self, name: str, model_data=None, **info):
+        """ Context manager measuring a stage.
+            Memory is measured only if tracemalloc is not already tracing (e.g. by an outer stage)
+
+        Parameters
+        ----------
+        name
+            Stage name
+        model_data
+            If set, number of rows and segments of model data are recorded when stage is finished
+        info
+            Other data to record
+        """
+        self._emit({'event': 'stage_start', 'stage': name, **info})
+        measure_memory = self.track_memory and not tracemalloc.is_tracing()
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield info
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            record = {'stage': name, 'seconds': time.perf_counter() - start, 'peak_memory_mb': None}
+            if measure_memory:
+                record['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            if model_data is not None and not failed:
+                record['rows'] = model_data.data.shape[0]
+                record['segments'] = len(model_data.get_segment_names())
+            record.update(info)
+            self.records.append(record)
+            self._emit({'event': 'stage_end', **record})
+
+    def report(self) -> pd.DataFrame:
+        """ Summary of recorded stages
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame indexed by stage name, in order of first call
+            Columns description:
+                calls - number of calls
+                total_seconds, mean_seconds, max_seconds - time of calls
+                peak_memory_mb - max peak memory of calls (if measured)
+                rows, segments - number of rows and segments after the last call
+        """
+        columns = ['calls', 'total_seconds', 'mean_seconds', 'max_seconds', 'peak_memory_mb', 'rows', 'segments']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+        records = pd.DataFrame(self.records)
+        for col in ['rows', 'segments']:
+            if col not in records.columns:
+                records[col] = None
+        grouped = records.groupby('stage', sort=False)
+        return pd.DataFrame({'calls': grouped['seconds'].count(),
+                             'total_seconds': grouped['seconds'].sum(),
+                             'mean_seconds': grouped['seconds'].mean(),
+                             'max_seconds': grouped['seconds'].max(),
+                             'peak_memory_mb': grouped['peak_memory_mb'].max(),
+                             'rows': grouped['rows'].last(),
+                             'segments': grouped['segments'].last()})[columns]
+
+
+def get_profiler(model_data) -> Profiler:
+    """ Get profiler of model data, creating it if needed
+    """
+    if getattr(model_data, 'profiler', None) is None:
+        model_data.profiler = Profiler()
+    return model_data.profiler
+
+
+def profiled(stage_name: str, model_arg: str = 'model_data'):
+    """ Decorator recording function calls as a stage in the profiler of model data
+
+    Parameters
+    ----------
+    stage_name
+    model_arg
+        Name of the function argument containing model data ("self" for methods)
+    """
+    def decorator(func):
+        position = list(inspect.signature(func).parameters).index(model_arg)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            model_data = kwargs.get(model_arg, args[position] if len(args) > position else None)
+            if model_data is None:
+                return func(*args, **kwargs)
+            with get_profiler(model_data).stage(stage_name, model_data):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
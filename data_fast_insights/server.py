@@ -0,0 +1,374 @@
+""" Local analysis server keeping converted model data in memory between requests.
+
+    Dashboards and scripts ask questions over HTTP (TCP or Unix socket) instead of importing the library,
+    reading data and converting it on every request. Calculations run in a pool of worker threads,
+    so the event loop answers other requests meanwhile, and responses are cached per model version:
+        server = AnalysisServer({'sales': dmd}, port=8050)
+        server.run()
+    or from the command line, with model data saved by BinaryDependenceModelData.save():
+        python -m data_fast_insights.server --model sales=/data/sales_model --port 8050
+
+    Requests are GET or POST with JSON body (or query string), responses are JSON, DataFrames are sent
+    in pandas "split" orientation ({"columns": [...], "index": [...], "data": [[...], ...]}):
+        GET  /health
+        GET  /models
+        POST /dependence         {"model": "sales", "sort_by": "group_importance", "top": 20, "base_col": "country"}
+        POST /drill_down         {"model": "sales", "path": ["country_US"], "depth": 1, "top": 3}
+        POST /compare_intervals  {"model": "sales", "selected": "age_[20, 30)"}
+        POST /drift              {"model": "sales_last_month", "current": "sales"}
+        POST /plot_data          {"model": "sales", "base_features": ["country"], "resort": "high_perc"}
+"""
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from http import HTTPStatus
+import json
+import logging
+import math
+import threading
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data_fast_insights._segment_results import SegmentResults
+
+if TYPE_CHECKING:
+    from data_fast_insights import BinaryDependenceModelData
+
+logger = logging.getLogger(__name__)
+
+# parameters naming model data in requests, responses depend on versions of all of them
+MODEL_PARAMS = ('model', 'current')
+# requests are small JSON documents of parameters
+MAX_BODY_SIZE = 2 ** 20
+
+
+def _plain(value):
+    """ JSON-serializable copy of a result: DataFrames in "split" orientation, NaN as null
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='split', double_precision=15, date_format='iso', default_handler=str))
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _parse_value(value: str):
+    # query string values are JSON if possible ("top=5", "path=[\"a\", \"b\"]"), strings otherwise
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class AnalysisServer:
+    """ Asyncio HTTP server answering analysis requests on resident model data.
+
+        Responses are cached by endpoint, parameters and versions of the requested model data,
+        identical requests arriving while the first one is calculated wait for its result.
+        Version of model data changes when it is registered again or invalidated (see invalidate()),
+        and when its data is replaced (e.g. by convert_to_binary() or construct_combs_up_to())
+    """
+    def __init__(self,
+                 models: Optional[dict] = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 path: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[Executor] = None,
+                 cache_size: int = 256,
+                 max_body_size: int = MAX_BODY_SIZE):
+        """
+        Parameters
+        ----------
+        models
+            {name: converted BinaryDependenceModelData}
+        host, port
+            Address of TCP server, port 0 picks a free port (see address)
+        path
+            Path of Unix socket, used instead of host and port if set
+        max_workers
+            Number of worker threads running calculations, see ThreadPoolExecutor
+        executor
+            Executor running calculations instead of the thread pool of the server
+        cache_size
+            Max number of cached responses
+        max_body_size
+            Max size of request body in bytes, larger requests are rejected with status 413
+        """
+        self.host, self.port, self.path = host, port, path
+        self.cache_size = cache_size
+        self.max_body_size = max_body_size
+        self._executor = executor
+        self._own_executor = executor is None
+        self._max_workers = max_workers
+        self._models = dict()
+        self._versions = dict()
+        self._cache = OrderedDict()
+        self._pending = dict()
+        self._results = dict()
+        self._results_lock = threading.Lock()
+        self._server = None
+        self.stats = {'requests': 0, 'cache_hits': 0, 'calculations': 0}
+        self._endpoints = {'dependence': self._dependence_response, 'drill_down': self._drill_down_response,
+                           'compare_intervals': self._compare_intervals_response, 'drift': self._drift_response,
+                           'plot_data': self._plot_data_response}
+        for name, model_data in (models or dict()).items():
+            self.add_model(name, model_data)
+
+    # Models
+
+    def add_model(self, name: str, model_data: 'BinaryDependenceModelData') -> None:
+        """ Register model data (replacing model data of the same name)
+        """
+        if not model_data.is_data_converted:
+            raise ValueError(f'Model data {name} must be converted to binary features (see convert_to_binary())')
+        self._models[name] = model_data
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def remove_model(self, name: str) -> None:
+        self._get_model(name)
+        del self._models[name]
+        self._versions[name] += 1
+
+    def invalidate(self, name: str) -> None:
+        """ Change version of model data, e.g. after it was modified in place
+        """
+        self._get_model(name)
+        self._versions[name] += 1
+
+    def model_version(self, name: str) -> tuple:
+        model_data = self._get_model(name)
+        return self._versions[name], id(model_data.data), model_data.data.shape
+
+    def _get_model(self, name) -> 'BinaryDependenceModelData':
+        if name not in self._models:
+            raise ValueError(f'Unknown model: {name}, available models: {sorted(self._models)}')
+        return self._models[name]
+
+    # Calculations (run in worker threads)
+
+    def _dependence(self, name: str) -> SegmentResults:
+        """ calculate_dependence() result of model data with query indexes, kept for the current version only
+        """
+        from data_fast_insights.calculations import calculate_dependence
+
+        version = self.model_version(name)
+        with self._results_lock:
+            res = self._results.get(name)
+        if res is None or res[0] != version:
+            model_data = self._get_model(name)
+            res = (version, SegmentResults(calculate_dependence(model_data=model_data), model_data.col_links))
+            with self._results_lock:
+                self._results[name] = res
+        return res[1]
+
+    def _dependence_response(self, model: str, sort_by: Optional[str] = None, ascending: bool = False,
+                             top: Optional[int] = None, base_col: Optional[str] = None) -> pd.DataFrame:
+        results = self._dependence(model)
+        if sort_by is not None:
+            res = results.frame.iloc[results.sorted_positions(sort_by, ascending, base_col)]
+        else:
+            res = results.frame if base_col is None else results.base(base_col)
+        return res if top is None else res.iloc[:top]
+
+    def _drill_down_response(self, model: str, **kwargs) -> list:
+        from data_fast_insights.calculations import calculate_drill_down
+
+        results = calculate_drill_down(self._get_model(model), **kwargs)
+        return [{'path': list(path), 'result': res} for path, res in results.items()]
+
+    def _compare_intervals_response(self, model: str, selected: str) -> pd.DataFrame:
+        from data_fast_insights.calculations import compare_intervals
+
+        return compare_intervals(selected, self._get_model(model))
+
+    def _drift_response(self, model: str, current: str, sort_by: str = 'psi',
+                        top: Optional[int] = None) -> pd.DataFrame:
+        from data_fast_insights.calculations import compare_drift
+
+        res = compare_drift(self._get_model(model), self._get_model(current), sort_by=sort_by)
+        return res if top is None else res.iloc[:top]
+
+    def _plot_data_response(self, model: str, **kwargs) -> dict:
+        from data_fast_insights.plotting import prepare_report_data
+
+        return prepare_report_data(self._get_model(model), self._dependence(model), **kwargs)
+
+    def _calculate(self, endpoint: str, params: dict) -> bytes:
+        result = self._endpoints[endpoint](**params)
+        return json.dumps(_plain(result), allow_nan=False).encode()
+
+    # Requests
+
+    def _cache_key(self, endpoint: str, params: dict) -> tuple:
+        versions = tuple((p, self.model_version(params[p])) for p in MODEL_PARAMS if p in params)
+        return endpoint, versions, json.dumps(params, sort_keys=True, default=str)
+
+    async def query(self, endpoint: str, params: Optional[dict] = None) -> bytes:
+        """ JSON response of an endpoint (e.g. "dependence") without HTTP, cached per model version
+        """
+        params = dict(params or dict())
+        if endpoint not in self._endpoints:
+            raise LookupError(f'Unknown endpoint: {endpoint}')
+        if 'model' not in params:
+            raise ValueError('"model" parameter is required')
+        key = self._cache_key(endpoint, params)
+        if key in self._cache:
+            self.stats['cache_hits'] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key in self._pending:
+            self.stats['cache_hits'] += 1
+            return await asyncio.shield(self._pending[key])
+
+        self.stats['calculations'] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._calculate, endpoint, params)
+        self._pending[key] = future
+        try:
+            response = await future
+        finally:
+            del self._pending[key]
+        # model data could change while calculating, such response is not cached
+        if self._cache_key(endpoint, params) == key:
+            self._cache[key] = response
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return response
+
+    async def dispatch(self, method: str, target: str, body: bytes = b'') -> tuple:
+        """ HTTP status and JSON body of the response to a request
+        """
+        self.stats['requests'] += 1
+        url = urlsplit(target)
+        endpoint = url.path.strip('/')
+        try:
+            if method not in ('GET', 'POST'):
+                return HTTPStatus.METHOD_NOT_ALLOWED, json.dumps({'error': f'Method {method} is not allowed'})
+            if endpoint == 'health':
+                return HTTPStatus.OK, json.dumps({'status': 'ok'})
+            if endpoint == 'models':
+                models = {name: {'version': self._versions[name], 'rows': model_data.data.shape[0],
+                                 'segments': len(model_data.col_links), 'y_name': model_data.y_name}
+                          for name, model_data in self._models.items()}
+                return HTTPStatus.OK, json.dumps(models)
+            params = {k: _parse_value(v) for k, v in parse_qsl(url.query)}
+            if body:
+                params.update(json.loads(body))
+            return HTTPStatus.OK, await self.query(endpoint, params)
+        except LookupError as e:
+            return HTTPStatus.NOT_FOUND, json.dumps({'error': str(e)})
+        except (ValueError, TypeError, NotImplementedError) as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': str(e)})
+        except Exception as e:
+            logger.exception(f'Request {target} failed')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': repr(e)})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = dict()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            content_length = headers.get('content-length') or '0'
+            if len(request_line) < 2:
+                status, payload = HTTPStatus.BAD_REQUEST, json.dumps({'error': 'Malformed request line'})
+            elif not (content_length.isascii() and content_length.isdigit()):
+                status, payload = HTTPStatus.BAD_REQUEST, json.dumps({'error': 'Invalid Content-Length header'})
+            elif int(content_length) > self.max_body_size:
+                status = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                payload = json.dumps({'error': f'Request body is larger than {self.max_body_size} bytes'})
+            else:
+                body = await reader.readexactly(int(content_length))
+                status, payload = await self.dispatch(request_line[0].upper(), request_line[1], body)
+            payload = payload if isinstance(payload, bytes) else payload.encode()
+            writer.write(f'HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n'
+                         f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Lifecycle
+
+    @property
+    def address(self):
+        """ (host, port) of the running TCP server or the path of its Unix socket
+        """
+        if self._server is None:
+            raise ValueError('Server is not started')
+        return self.path if self.path is not None else self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='dfi-server')
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        logger.info(f'Analysis server is listening on {self.address}')
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def run(self) -> None:
+        """ Serve requests until interrupted (blocks the calling thread)
+        """
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    from data_fast_insights import BinaryDependenceModelData
+
+    parser = argparse.ArgumentParser(description='Local analysis server of data_fast_insights')
+    parser.add_argument('--model', action='append', default=list(), metavar='NAME=PATH',
+                        help='Model data saved by BinaryDependenceModelData.save(), can be repeated')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--path', help='Path of Unix socket to listen on instead of host and port')
+    parser.add_argument('--max-workers', type=int, help='Number of worker threads')
+    args = parser.parse_args()
+
+    models = dict()
+    for spec in args.model:
+        name, _, path = spec.partition('=')
+        if not path:
+            parser.error(f'--model must be NAME=PATH, got {spec}')
+        models[name] = BinaryDependenceModelData.load(path)
+    logging.basicConfig(level=logging.INFO)
+    AnalysisServer(models, host=args.host, port=args.port, path=args.path, max_workers=args.max_workers).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
-from .calc_utils import choose_central_tendency_metric
+from .calc_utils import choose_central_tendency_metric, segments_central_tendency
 from .misc import remove_base_name, change_interval_name_for_plot, get_segment_name_ready_for_plot, resort_binary_names
 from .model_utils import exclude_zero_var, singular_experiment
 
-__all__ = ['choose_central_tendency_metric', 'remove_base_name', 'exclude_zero_var', 'change_interval_name_for_plot',
-           'get_segment_name_ready_for_plot', 'resort_binary_names', 'singular_experiment']
+__all__ = ['choose_central_tendency_metric', 'segments_central_tendency', 'remove_base_name', 'exclude_zero_var',
+           'change_interval_name_for_plot', 'get_segment_name_ready_for_plot', 'resort_binary_names', 'singular_experiment']
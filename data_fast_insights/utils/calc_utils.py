@@ -1,4 +1,7 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Union
+
+import numpy as np
+import pandas as pd
 
 if TYPE_CHECKING:
     from data_fast_insights import BinaryDependenceModelData
@@ -12,3 +15,107 @@ def choose_central_tendency_metric(col_name: str, model_data: 'BinaryDependenceM
     else:
         raise ValueError('col_name not found in num_cols or cat_cols of model_data')
     return use_metrics
+
+
+def _metric_name(metric) -> str:
+    return f'quantile {metric:g}' if isinstance(metric, float) else metric
+
+
+def _group_mode(values: pd.Series):
+    modes = values.mode()
+    return modes.iloc[0] if len(modes) else np.nan
+
+
+def _weighted_stat(values: pd.Series, weights: np.ndarray, metric):
+    """ Metric of values where every value is repeated "weight" times, rows with zero weight are ignored
+    """
+    valid = values.notna().to_numpy() & (weights > 0)
+    if not valid.any():
+        return np.nan
+    values, weights = values[valid], weights[valid]
+    if metric == 'mode':
+        # sorted by value, so the smallest of the most frequent values is taken, as in _group_mode()
+        totals = pd.Series(weights).groupby(values.to_numpy()).sum()
+        return totals.index[totals.to_numpy().argmax()]
+    if metric == 'mean':
+        return (values.to_numpy(dtype=float) * weights).sum() / weights.sum()
+    from data_fast_insights._binary_dependence_model_data import _weighted_quantile
+
+    return float(_weighted_quantile(values.to_numpy(dtype=float), weights, 0.5 if metric == 'median' else metric))
+
+
+def segments_central_tendency(model_data: 'BinaryDependenceModelData',
+                              segments: Iterable[str],
+                              y_name: str,
+                              metrics: Union[str, float, Iterable[Union[str, float]]] = 'mean') -> pd.DataFrame:
+    """ Central tendency of y_name values in segments, calculated with one grouped aggregation
+
+    Parameters
+    ----------
+    model_data
+    segments
+        Segments of model data, usually segments of one base feature
+    y_name
+        Target or any other column of base data
+    metrics
+        "mean", "median", "mode" or a float in (0, 1) for a quantile, or a list of them
+
+    Returns
+    -------
+    pd.DataFrame
+        Index is segments, columns are metrics ("quantile 0.9" for quantiles).
+        Mode is the smallest of the most frequent values, NaN for empty segments.
+        If model data has row weights (weight_col, sample, drill_down()), metrics are weighted:
+        every row is repeated "weight" times, rows outside a drilled down segment are ignored
+    """
+    segments = list(segments)
+    metrics = [metrics] if isinstance(metrics, (str, float)) else list(metrics)
+    for metric in metrics:
+        if isinstance(metric, float):
+            if not 0 <= metric <= 1:
+                raise ValueError(f'Quantile must be in [0, 1], got {metric}')
+        elif metric not in ('mean', 'median', 'mode'):
+            raise ValueError(f'Unknown metric: {metric}. Use "mean", "median", "mode" or a float quantile')
+
+    values = model_data.base_data[y_name].reset_index(drop=True)
+    features = model_data.data[segments].to_numpy()
+    if model_data.weights is not None:
+        weights = model_data.weights.to_numpy(dtype=float)
+        # e.g. rows outside a drilled down segment are dropped once, not for every segment
+        keep = np.flatnonzero(weights > 0)
+        values, weights, features = values.iloc[keep].reset_index(drop=True), weights[keep], features[keep]
+        result = {_metric_name(metric): [_weighted_stat(values[features[:, i] == 1], weights[features[:, i] == 1],
+                                                        metric) for i in range(len(segments))]
+                  for metric in metrics}
+        return pd.DataFrame(result, index=segments)
+
+    n_segments = features.sum(axis=1)
+    if n_segments.size == 0 or n_segments.max() <= 1:
+        # segments of a base feature do not intersect: every row has one code (-1 if it is in no segment),
+        # so all segments are aggregated by one groupby
+        codes = np.where(n_segments > 0, features.argmax(axis=1), -1)
+        grouped = values.groupby(codes)
+        result = dict()
+        for metric in metrics:
+            if metric == 'mode':
+                stat = grouped.agg(_group_mode)
+            elif isinstance(metric, float):
+                stat = grouped.quantile(metric)
+            else:
+                stat = getattr(grouped, metric)()
+            result[_metric_name(metric)] = stat.reindex(range(len(segments))).to_numpy()
+        return pd.DataFrame(result, index=segments)
+
+    # intersecting segments (e.g. combinations linked to the base feature): one boolean mask per segment
+    result = {_metric_name(metric): list() for metric in metrics}
+    for i in range(len(segments)):
+        segment_values = values[features[:, i] == 1]
+        for metric in metrics:
+            if metric == 'mode':
+                stat = _group_mode(segment_values)
+            elif isinstance(metric, float):
+                stat = segment_values.quantile(metric)
+            else:
+                stat = getattr(segment_values, metric)()
+            result[_metric_name(metric)].append(stat)
+    return pd.DataFrame(result, index=segments)
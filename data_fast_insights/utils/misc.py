@@ -1,5 +1,7 @@
 import logging
 
+from data_fast_insights._segment_results import SegmentResults
+
 
 def resort_binary_names(feat_names, by, base_feature_name, res_low_df):
     if by == 'default':
@@ -9,6 +11,9 @@ def resort_binary_names(feat_names, by, base_feature_name, res_low_df):
         feat_names = sorted(feat_names, reverse=False)
     elif by == 'name_desc':
         feat_names = sorted(feat_names, reverse=True)
+    elif isinstance(res_low_df, SegmentResults) and by in res_low_df.frame.columns:
+        # presorted order of the metric, no filtering of the whole result
+        feat_names = res_low_df.sorted_segments(by, base_col=base_feature_name)
     elif by in res_low_df.columns:
         feat_names = res_low_df[res_low_df['base_col'] == base_feature_name][[by]].sort_values(by=by).index
     else:
@@ -1,8 +1,5 @@
 import logging
 
-from data_fast_insights import BinaryDependenceModelData
-import data_fast_insights.calculations as calc
-
 
 def exclude_zero_var(df, num_cols, cat_cols):
     exclude_nums = list()
@@ -20,6 +17,10 @@ def exclude_zero_var(df, num_cols, cat_cols):
 
 
 def singular_experiment(part_data, cat_feats=None, num_feats=None, y_name=None, num_bins=None, **kwargs):
+    # imported here: utils are used by the model and calculations modules themselves
+    from data_fast_insights import BinaryDependenceModelData
+    import data_fast_insights.calculations as calc
+
     dmd = BinaryDependenceModelData(
         base_data=part_data.copy(),
         cat_cols=cat_feats,
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fast_insights import BinaryDependenceModelData
+import data_fast_insights.calculations as calc
+
+
+def make_data(n_rows: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'color': rng.choice(['red', 'green', 'blue'], n_rows),
+        'shape': rng.choice(['a', 'b', 'c', 'd'], n_rows, p=[.4, .3, .2, .1]),
+        'age': rng.normal(10, 3, n_rows).round(1),
+        'speed': np.where(rng.random(n_rows) < .05, np.nan, rng.gamma(2, 30, n_rows).round()),
+    })
+    data['sales'] = 50 + 5 * (data['color'] == 'red') - data['age'] + rng.normal(0, 5, n_rows)
+    return data
+
+
+def make_model_data(data: pd.DataFrame, bins: dict = None, **kwargs) -> BinaryDependenceModelData:
+    model_data = BinaryDependenceModelData(data, 'sales', {'color', 'shape'}, {'age', 'speed'}, **kwargs)
+    if bins is None:
+        bins = calc.make_bins(model_data=model_data)
+    model_data.convert_to_binary(bins=bins)
+    return model_data
+
+
+@pytest.fixture
+def data() -> pd.DataFrame:
+    return make_data()
+
+
+@pytest.fixture(scope='session')
+def bins() -> dict:
+    return make_model_data(make_data()).bins
+
+
+@pytest.fixture
+def model_data(data, bins) -> BinaryDependenceModelData:
+    return make_model_data(data, bins)
+
+
+@pytest.fixture
+def model_data_factory(data, bins):
+    """ Makes new model data of the same data, e.g. to compare results of different settings
+    """
+    return lambda **kwargs: make_model_data(data, bins, **kwargs)
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+import data_fast_insights.calculations as calc
+from data_fast_insights import BinaryDependenceModelData
+from data_fast_insights._arrow_input import is_arrow_input
+
+from conftest import make_model_data
+
+
+def _assert_same_dependence(model_data, expected_model_data):
+    assert set(model_data.base_data.columns) == {'sales', 'color', 'shape', 'age', 'speed'}
+    res = calc.calculate_dependence(model_data=model_data)
+    expected = calc.calculate_dependence(model_data=expected_model_data)
+    pd.testing.assert_frame_equal(res, expected.loc[res.index], check_dtype=False, check_categorical=False)
+
+
+def test_pandas_is_not_arrow_input(data):
+    assert not is_arrow_input(data)
+    with pytest.raises(TypeError):
+        BinaryDependenceModelData(data.to_dict(), 'sales', {'color', 'shape'}, {'age', 'speed'})
+
+
+def test_arrow_table(data, bins):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.Table.from_pandas(data.assign(unused=1), preserve_index=False)
+
+    model_data = make_model_data(table, bins)
+    assert isinstance(model_data.base_data['color'].dtype, pd.CategoricalDtype)
+    _assert_same_dependence(model_data, make_model_data(data, bins))
+
+
+def test_parquet_column_projection(data, bins, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'data.parquet'
+    data.assign(unused=1).to_parquet(path, index=False)
+
+    model_data = BinaryDependenceModelData.from_parquet(str(path), 'sales', {'color', 'shape'}, {'age', 'speed'})
+    model_data.convert_to_binary(bins=bins)
+    _assert_same_dependence(model_data, make_model_data(data, bins))
+
+
+def test_polars_frame(data, bins):
+    pytest.importorskip('pyarrow')
+    pl = pytest.importorskip('polars')
+
+    _assert_same_dependence(make_model_data(pl.from_pandas(data.assign(unused=1)), bins), make_model_data(data, bins))
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+import data_fast_insights.calculations as calc
+
+from conftest import make_model_data
+
+
+def _assert_bins_equal(bins, expected):
+    assert bins.keys() == expected.keys()
+    for col in expected:
+        pd.testing.assert_frame_equal(bins[col].reset_index(drop=True), expected[col].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('per_column', [False, True])
+def test_cache_hit(model_data, tmp_path, per_column):
+    cache = calc.BinsCache(str(tmp_path), per_column=per_column)
+    bins = calc.make_bins(model_data=model_data, cache=cache, n_threads=2)
+    cached = calc.make_bins(model_data=model_data, cache=cache, n_threads=2)
+
+    assert cache.misses > 0 and cache.hits == cache.misses
+    _assert_bins_equal(cached, bins)
+    _assert_bins_equal(bins, calc.make_bins(model_data=model_data, n_threads=2))
+
+
+def test_changed_column_is_rebinned(data, bins, tmp_path):
+    cache = calc.BinsCache(str(tmp_path), per_column=True)
+    calc.make_bins(model_data=make_model_data(data, bins), cache=cache, n_threads=2)
+    misses = cache.misses
+
+    data['speed'] = data['speed'] * 2
+    changed = make_model_data(data, bins)
+    new_bins = calc.make_bins(model_data=changed, cache=cache, n_threads=2)
+
+    # only the changed column is binned again
+    assert cache.misses == misses + 1 and cache.hits == 1
+    _assert_bins_equal(new_bins, calc.make_bins(model_data=changed, n_threads=2))
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import data_fast_insights._binary_dependence_model_data as model_module
+
+
+@pytest.fixture
+def small_batches(monkeypatch, model_data):
+    # 10 combinations per batch
+    monkeypatch.setattr(model_module, '_COMBS_BATCH_CELLS', 10 * model_data.data.shape[0])
+
+
+def _combs(model_data):
+    return [s for s in model_data.get_segment_names() if '_AND_' in s]
+
+
+def test_progress(model_data, small_batches):
+    events = list()
+    status = model_data.construct_combs_up_to(2, progress=events.append)
+
+    assert status['completed'] and status['stopped_by'] is None
+    assert [e['done'] for e in events] == list(range(10, status['total'], 10)) + [status['total']]
+    assert events[-1]['percent'] == pytest.approx(100)
+    assert events[-1]['eta'] == pytest.approx(0)
+    assert len(_combs(model_data)) == status['total']
+
+
+def test_cancel_keeps_constructed(model_data, small_batches):
+    checks = {'n': 0}
+
+    def cancel():
+        # checked after every batch: cancelled after the second one
+        checks['n'] += 1
+        return checks['n'] >= 2
+
+    status = model_data.construct_combs_up_to(3, cancel=cancel)
+
+    assert not status['completed'] and status['stopped_by'] == 'cancel'
+    assert status['done'] == 20 < status['total']
+    combs = _combs(model_data)
+    assert len(combs) == 20 and all(c in model_data.col_links for c in combs)
+    for comb in combs:
+        members = json.loads(model_data.col_links[comb])
+        assert (model_data.data[comb] == model_data.data[members].all(axis=1).astype(int)).all()
+
+
+def test_memory_budget(model_data, small_batches):
+    batch_memory = 10 * model_data.data.shape[0] * 8
+    status = model_data.construct_combs_up_to(2, memory_budget=int(2.5 * batch_memory))
+
+    assert status['stopped_by'] == 'memory_budget'
+    assert status['done'] == 20 and len(_combs(model_data)) == 20
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_fast_insights.calculations as calc
+
+from conftest import make_model_data
+
+
+def _expanded(data, bins):
+    data['cnt'] = np.random.default_rng(5).integers(1, 4, data.shape[0])
+    weighted = make_model_data(data, bins, weight_col='cnt')
+    expanded = make_model_data(data.loc[data.index.repeat(data['cnt'])].drop(columns='cnt').reset_index(drop=True),
+                               bins)
+    return weighted, expanded
+
+
+def test_weighted_equals_expanded(data, bins):
+    weighted, expanded = _expanded(data, bins)
+    selected = next(s for s, col in weighted.col_links.items() if col == 'age')
+
+    res = calc.compare_intervals(selected, weighted)
+    expected = calc.compare_intervals(selected, expanded).reset_index(drop=True)
+    pd.testing.assert_frame_equal(res, expected.astype(res.dtypes), check_exact=False, rtol=1e-9)
+
+
+def test_weighted_categorical(data, bins):
+    weighted, expanded = _expanded(data, bins)
+
+    res = calc.compare_intervals('color_red', weighted)
+    expected = calc.compare_intervals('color_red', expanded).reset_index(drop=True)
+    assert list(res['new_col']) == list(expected['new_col'])
+    np.testing.assert_allclose(res['total_target_change_perc'], expected['total_target_change_perc'].astype(float))
+    base_data = expanded.base_data
+    assert list(res['old_mode']) == ['red'] * len(res)
+    assert list(res['new_mode']) == [base_data.loc[expanded.data[s] == 1, 'color'].mode().iloc[0]
+                                     for s in res['new_col']]
+
+
+def test_numeric_feature_drilled_down(model_data):
+    selected = next(s for s, col in model_data.col_links.items() if col == 'age')
+    res = calc.compare_intervals(selected, model_data.drill_down('color_red'))
+
+    assert len(res) == sum(col == 'age' for col in model_data.col_links.values()) - 1
+    in_segment = model_data.data['color_red'] == 1
+    base_data = model_data.base_data[in_segment.to_numpy()]
+    assert res['old_base_mean'].iloc[0] == pytest.approx(base_data['age'].mean())
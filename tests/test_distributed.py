@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+
+import data_fast_insights.calculations as calc
+
+from conftest import make_model_data
+
+
+def test_partitioned_equals_single_process(data, bins):
+    partitions = np.array_split(data, 3)
+    res = calc.calculate_dependence_partitioned(partitions, 'sales', {'color', 'shape'}, {'age', 'speed'}, bins=bins,
+                                                n_jobs=2)
+    expected = calc.calculate_dependence(model_data=make_model_data(data, bins))
+    pd.testing.assert_frame_equal(res, expected)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_fast_insights.calculations as calc
+from data_fast_insights import utils
+from data_fast_insights.plotting import prepare_report_data
+
+from conftest import make_model_data
+
+METRICS = ['mean', 'median', 0.9]
+
+
+def test_drill_down_dependence(model_data):
+    child = model_data.drill_down('color_red')
+    res = calc.calculate_dependence(model_data=child)
+
+    in_segment = model_data.data['color_red'] == 1
+    shape_segments = [s for s, col in model_data.col_links.items() if col == 'shape']
+    expected = model_data.data.loc[in_segment, shape_segments].mean() * 100
+    np.testing.assert_allclose(res.loc[shape_segments, 'perc_of_total'].astype(float), expected)
+
+
+def test_drill_down_central_tendency(model_data):
+    child = model_data.drill_down('color_red')
+    in_segment = (model_data.data['color_red'] == 1).to_numpy()
+    age_segments = [s for s, col in model_data.col_links.items() if col == 'age']
+    base_data = model_data.base_data.reset_index(drop=True)
+
+    stats = utils.segments_central_tendency(child, age_segments, 'sales', METRICS)
+    modes = utils.segments_central_tendency(child, age_segments, 'shape', 'mode')
+    for segment in age_segments:
+        rows = in_segment & (model_data.data[segment] == 1).to_numpy()
+        values = base_data.loc[rows, 'sales']
+        assert stats.loc[segment, 'mean'] == pytest.approx(values.mean())
+        assert stats.loc[segment, 'median'] == pytest.approx(values.median())
+        assert stats.loc[segment, 'quantile 0.9'] == pytest.approx(values.quantile(0.9))
+        assert modes.loc[segment, 'mode'] == base_data.loc[rows, 'shape'].mode().iloc[0]
+
+
+def test_weighted_central_tendency(data, bins):
+    data['cnt'] = np.random.default_rng(3).integers(0, 4, data.shape[0])
+    weighted = make_model_data(data, bins, weight_col='cnt')
+    expanded = make_model_data(data.loc[data.index.repeat(data['cnt'])].drop(columns='cnt').reset_index(drop=True),
+                               bins)
+    segments = [s for s, col in weighted.col_links.items() if col == 'age']
+
+    pd.testing.assert_frame_equal(utils.segments_central_tendency(weighted, segments, 'sales', METRICS),
+                                  utils.segments_central_tendency(expanded, segments, 'sales', METRICS))
+    pd.testing.assert_frame_equal(utils.segments_central_tendency(weighted, segments, 'shape', 'mode'),
+                                  utils.segments_central_tendency(expanded, segments, 'shape', 'mode'))
+
+
+def test_drill_down_report_data(model_data):
+    child = model_data.drill_down('color_red')
+    report_data = prepare_report_data(child, calc.calculate_dependence(model_data=child), base_features=['shape'])
+
+    in_segment = model_data.data['color_red'] == 1
+    segments = [s for s, col in model_data.col_links.items() if col == 'shape']
+    y_means = {s: model_data.data.loc[in_segment & (model_data.data[s] == 1), 'sales'].mean() for s in segments}
+    np.testing.assert_allclose(sorted(report_data['shape']['y_mean']), sorted(y_means.values()))
+    assert sum(report_data['shape']['perc_of_total']) == pytest.approx(100)
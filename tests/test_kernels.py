@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fast_insights import kernels
+import data_fast_insights.calculations as calc
+
+
+@pytest.fixture(params=['numpy', 'numba'])
+def backend(request):
+    if request.param == 'numba':
+        pytest.importorskip('numba')
+    with kernels.use_backend(request.param):
+        yield request.param
+
+
+@pytest.fixture
+def features() -> np.ndarray:
+    rng = np.random.default_rng(1)
+    return (rng.random((500, 12)) < 0.3).astype(np.uint8)
+
+
+def test_segment_sums(backend, features):
+    rng = np.random.default_rng(2)
+    vectors = [np.ones(features.shape[0]), rng.random(features.shape[0]), rng.normal(size=features.shape[0])]
+    res = kernels.segment_sums(features, vectors)
+
+    frame = pd.DataFrame(features)
+    for vector, sums in zip(vectors, res):
+        expected = frame.apply(lambda col: pd.Series(vector)[col == 1].sum())
+        np.testing.assert_allclose(sums, expected.to_numpy(), rtol=1e-10, atol=1e-10)
+
+
+def test_and_combine(backend, features):
+    combs = np.array([[0, 1], [2, 5], [3, 3], [11, 0]])
+    res = kernels.and_combine(features, combs)
+
+    frame = pd.DataFrame(features)
+    expected = np.column_stack([frame[list(comb)].all(axis=1).astype(int) for comb in combs])
+    np.testing.assert_array_equal(res, expected)
+    np.testing.assert_array_equal(kernels.and_combine(features, combs[:, :1]), features[:, [0, 2, 3, 11]])
+
+
+def test_calculate_dependence(backend, model_data):
+    res = calc.calculate_dependence(model_data=model_data)
+
+    data = model_data.data
+    segments = model_data.get_segment_names()
+    is_low = data[model_data.y_binary_name] == 1
+    np.testing.assert_allclose(res.loc[segments, 'total_sum'], data[segments].sum())
+    np.testing.assert_allclose(res.loc[segments, 'low_sum'], data.loc[is_low, segments].sum())
+    np.testing.assert_allclose(res.loc[segments, 'perc_of_total'], data[segments].mean() * 100)
+    y_means = pd.Series({s: data.loc[data[s] == 1, model_data.y_name].mean() for s in segments})
+    y_mean = data[model_data.y_name].mean()
+    np.testing.assert_allclose(res.loc[segments, 'target_delta_perc'], (y_means / y_mean - 1) * 100)
+
+
+def test_construct_combs_up_to(backend, model_data):
+    model_data.construct_combs_up_to(2)
+
+    combs = [s for s in model_data.get_segment_names() if '_AND_' in s]
+    assert combs
+    for comb in combs:
+        members = json.loads(model_data.col_links[comb])
+        expected = model_data.data[members].all(axis=1).astype(int)
+        np.testing.assert_array_equal(model_data.data[comb].astype(int), expected)
+
+
+def test_backends_match(model_data_factory):
+    pytest.importorskip('numba')
+    results = dict()
+    for backend in ['numpy', 'numba']:
+        with kernels.use_backend(backend):
+            model_data = model_data_factory()
+            model_data.construct_combs_up_to(2)
+            results[backend] = (model_data.data, calc.calculate_dependence(model_data=model_data))
+    pd.testing.assert_frame_equal(results['numpy'][0], results['numba'][0])
+    pd.testing.assert_frame_equal(results['numpy'][1], results['numba'][1], check_exact=False, rtol=1e-10)
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_fast_insights import BinaryDependenceModelData
+import data_fast_insights.calculations as calc
+from data_fast_insights.plotting import prepare_report_data, render_report
+
+
+def test_render_report_unique_file_names(tmp_path):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({col: rng.choice(['x', 'y'], 300) for col in ['a b', 'a/b', 'A B']})
+    data['sales'] = rng.normal(size=300)
+    model_data = BinaryDependenceModelData(data, 'sales', set(data.columns) - {'sales'})
+    model_data.convert_to_binary()
+
+    paths = render_report(model_data, calc.calculate_dependence(model_data=model_data), str(tmp_path), fmt='png')
+
+    assert set(paths) == {'a b', 'a/b', 'A B'}
+    assert len({p.lower() for p in paths.values()}) == 3
+    assert all(os.path.isfile(p) for p in paths.values())
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_prepare_report_data(model_data):
+    res = calc.calculate_dependence(model_data=model_data)
+    report_data = prepare_report_data(model_data, res, base_features=['color'])
+
+    segments = [s for s, col in model_data.col_links.items() if col == 'color']
+    assert sorted(report_data['color']['perc_of_total']) == sorted(res.loc[segments, 'perc_of_total'].tolist())
+    y_means = [model_data.data.loc[model_data.data[s] == 1, 'sales'].mean() for s in segments]
+    np.testing.assert_allclose(sorted(report_data['color']['y_mean']), sorted(y_means))
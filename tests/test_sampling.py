@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import data_fast_insights.calculations as calc
+
+METRICS = ['low_perc', 'target_delta_perc', 'group_importance']
+
+
+@pytest.mark.parametrize('sample', [0.3, 500])
+def test_sample_weights(model_data, model_data_factory, sample):
+    sampled = model_data_factory(sample=sample, random_state=0)
+
+    expected_rows = 500 if sample == 500 else int(round(model_data.data.shape[0] * sample))
+    assert abs(sampled.data.shape[0] - expected_rows) <= 2
+    # design weights represent all rows of every stratum of the binary target
+    assert sampled.weights.sum() == pytest.approx(model_data.data.shape[0])
+    is_low = (sampled.data[sampled.y_binary_name] == 1).to_numpy()
+    n_low = (model_data.data[model_data.y_binary_name] == 1).sum()
+    assert sampled.weights[is_low].sum() == pytest.approx(n_low)
+
+
+def test_confidence_intervals(model_data, model_data_factory):
+    full = calc.calculate_dependence(model_data=model_data)
+    res = calc.calculate_dependence(model_data=model_data_factory(sample=0.5, random_state=0), confidence=0.95)
+
+    segments = res.index[res['total_sum'] > 0]
+    covered = list()
+    for metric in METRICS:
+        low, high = res.loc[segments, f'{metric}_ci_low'], res.loc[segments, f'{metric}_ci_high']
+        assert (low <= res.loc[segments, metric] + 1e-9).all() and (res.loc[segments, metric] <= high + 1e-9).all()
+        truth = full.loc[segments, metric].astype(float)
+        covered.append(((low <= truth) & (truth <= high)).mean())
+    assert min(covered) >= 0.8
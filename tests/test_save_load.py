@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+import data_fast_insights.calculations as calc
+from data_fast_insights import BinaryDependenceModelData
+import data_fast_insights._binary_dependence_model_data as model_module
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_round_trip(model_data, tmp_path, mmap):
+    model_data.construct_partial_combs('color')
+    model_data.save(str(tmp_path))
+    loaded = BinaryDependenceModelData.load(str(tmp_path), mmap=mmap)
+
+    pd.testing.assert_frame_equal(loaded.data, model_data.data, check_dtype=False)
+    pd.testing.assert_frame_equal(loaded.base_data, model_data.base_data)
+    assert loaded.col_links == model_data.col_links
+    assert loaded.bins.keys() == model_data.bins.keys()
+    assert loaded.y_pivot == model_data.y_pivot
+    pd.testing.assert_frame_equal(calc.calculate_dependence(model_data=loaded),
+                                  calc.calculate_dependence(model_data=model_data))
+
+
+def test_unsupported_version(model_data, tmp_path, monkeypatch):
+    model_data.save(str(tmp_path))
+    monkeypatch.setattr(model_module, '_STORE_VERSION', model_module._STORE_VERSION + 1)
+    with pytest.raises(ValueError, match='Unsupported version'):
+        BinaryDependenceModelData.load(str(tmp_path))
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import data_fast_insights.calculations as calc
+from data_fast_insights import SegmentResults, utils
+
+
+@pytest.fixture
+def res(model_data):
+    model_data.construct_partial_combs('color')
+    model_data.construct_combs_up_to(2)
+    return calc.calculate_dependence(model_data=model_data)
+
+
+@pytest.fixture
+def results(model_data, res):
+    return SegmentResults(res, model_data.col_links)
+
+
+def test_base(results, res):
+    for base_col in results.base_cols:
+        assert list(results.base(base_col).index) == list(res.index[res['base_col'].astype(object) == base_col])
+    assert results.base('unknown').empty
+
+
+def test_containing(results, res):
+    expected = list()
+    for segment, base_col in res['base_col'].items():
+        if '_AND_' not in segment:
+            continue
+        members = json.loads(base_col) if base_col.startswith('[') else segment.split('_AND_')
+        if 'shape_a' in members:
+            expected.append(segment)
+    assert expected
+    assert sorted(results.containing('shape_a').index) == sorted(expected)
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_top(results, res, ascending):
+    expected = res.sort_values('group_importance', ascending=ascending, kind='stable')
+    assert list(results.top('group_importance', 7, ascending=ascending).index) == list(expected.index[:7])
+
+    shape = res[res['base_col'].astype(object) == 'shape'].sort_values('low_perc', ascending=ascending, kind='stable')
+    assert results.sorted_segments('low_perc', ascending, base_col='shape') == list(shape.index)
+
+
+def test_between(results, res):
+    expected = res[(res['perc_of_total'] >= 5) & (res['perc_of_total'] <= 20)]
+    assert sorted(results.between('perc_of_total', 5, 20).index) == sorted(expected.index)
+    assert len(results.between('perc_of_total', low=5)) == (res['perc_of_total'] >= 5).sum()
+    with pytest.raises(ValueError, match='Unknown metric'):
+        results.between('unknown', 0, 1)
+
+
+def test_loc(results, res):
+    segments = list(res.index[[3, 0, 5]])
+    assert list(results.loc(segments).index) == segments
+    with pytest.raises(KeyError, match="'nope'"):
+        results.loc([segments[0], 'nope'])
+
+
+def test_resort_binary_names(model_data, results, res):
+    names = [s for s, col in model_data.col_links.items() if col == 'age']
+    assert utils.resort_binary_names(names, 'low_perc', 'age', results) == \
+        list(utils.resort_binary_names(names, 'low_perc', 'age', res))
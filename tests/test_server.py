@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+import data_fast_insights.calculations as calc
+from data_fast_insights.server import AnalysisServer
+
+
+async def _request(address, raw: bytes) -> tuple:
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def _post(path: str, params: dict) -> bytes:
+    body = json.dumps(params).encode()
+    return f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+
+
+def _serve(models: dict, requests: list, **kwargs) -> tuple:
+    """ Responses of a server on a free localhost port to requests sent one by one, and the server
+    """
+    async def run():
+        server = AnalysisServer(models, max_workers=2, **kwargs)
+        await server.start()
+        try:
+            return [await _request(server.address, raw) for raw in requests], server
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_dependence(model_data):
+    params = {'model': 'm', 'sort_by': 'group_importance', 'top': 5}
+    query = b'GET /dependence?model=m&top=5&sort_by=group_importance HTTP/1.1\r\n\r\n'
+    responses, server = _serve({'m': model_data}, [_post('/dependence', params), _post('/dependence', params), query])
+
+    expected = calc.calculate_dependence(model_data=model_data)
+    expected = expected.sort_values('group_importance', ascending=False, kind='stable')
+    assert [status for status, _ in responses] == [200, 200, 200]
+    assert responses[0][1]['index'] == list(expected.index[:5])
+    assert responses[1] == responses[0] == responses[2]
+    assert server.stats['calculations'] == 1
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-5', '1.5', '²'])
+def test_invalid_content_length(model_data, content_length):
+    raw = f'POST /dependence HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n{{}}'.encode()
+    (response,), _ = _serve({'m': model_data}, [raw])
+    assert response == (400, {'error': 'Invalid Content-Length header'})
+
+
+def test_body_size_limit(model_data):
+    (response,), _ = _serve({'m': model_data}, [_post('/dependence', {'model': 'm', 'pad': 'x' * 100})],
+                            max_body_size=64)
+    assert response[0] == 413
+
+
+def test_errors(model_data):
+    responses, _ = _serve({'m': model_data}, [_post('/dependence', {'model': 'nope'}),
+                                              _post('/unknown', {'model': 'm'}),
+                                              b'POST /dependence HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}'])
+    assert [status for status, _ in responses] == [400, 404, 400]
@@ -0,0 +1,27 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_fast_insights.calculations as calc
+
+
+def _dependence(shared):
+    model_data = shared.attach()
+    return calc.calculate_dependence(model_data=model_data), model_data.base_data
+
+
+def test_attach_in_worker(model_data):
+    with model_data.to_shared_memory() as shared:
+        attached = shared.attach()
+        # numeric raw columns are views of shared memory, not unpickled copies
+        assert not attached.base_data['age'].to_numpy().flags.writeable
+        pd.testing.assert_frame_equal(attached.base_data, model_data.base_data)
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            res, base_data = pool.submit(_dependence, shared).result()
+        del attached
+
+    pd.testing.assert_frame_equal(base_data, model_data.base_data)
+    pd.testing.assert_frame_equal(res, calc.calculate_dependence(model_data=model_data))
+    assert np.array_equal(base_data.columns, model_data.base_data.columns)
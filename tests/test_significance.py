@@ -0,0 +1,17 @@
+import pytest
+
+import data_fast_insights.calculations as calc
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'permutation'])
+def test_significance_shape(model_data, method):
+    res = calc.calculate_significance(model_data, method=method, n_resamples=30, batch_size=7)
+    assert list(res.index) == model_data.get_segment_names()
+    assert res.notna().any().all()
+
+
+@pytest.mark.parametrize('kwargs', [{'n_resamples': 0}, {'n_resamples': -5}, {'n_resamples': 10.5},
+                                    {'batch_size': 0}, {'batch_size': -1}, {'batch_size': '20'}])
+def test_significance_rejects_invalid_resampling(model_data, kwargs):
+    with pytest.raises(ValueError, match='must be a positive integer'):
+        calc.calculate_significance(model_data, **kwargs)
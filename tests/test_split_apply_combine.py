@@ -0,0 +1,47 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from data_fast_insights.experimental import SplitApplyCombineModelData
+
+
+@pytest.fixture
+def sac(data, bins):
+    # base model data is not converted, so its col_links are empty
+    sac = SplitApplyCombineModelData(data, 'sales', {'color', 'shape'}, {'age', 'speed'}, 'mean')
+    sac.global_num_bins = bins
+    sac.split('shape')
+    sac.multiple_singular_experiments(y_type='mean')
+    return sac
+
+
+def test_reduce(sac):
+    sac.filter_transpose_results()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        sac.reduce()
+
+    reports = [r['res'] for r in sac.exp_data_reports.values()]
+    assert sac.total_res.loc['color_red', 'number_of_experiments'] == len(reports)
+    expected = np.mean([r.loc['high_perc', 'color_red'] for r in reports])
+    assert sac.total_res.loc['color_red', 'high_perc'] == pytest.approx(expected)
+    assert sac.total_res.loc['color_red', 'base_col'] == 'color'
+
+
+def test_refilter_rebuilds_stacked_results(sac):
+    sac.filter_transpose_results()
+    sac.reduce()
+    all_segments = set(sac.total_res.index)
+
+    sac.filter_transpose_results({'perc_of_total': 30})
+    sac.reduce()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        stability = sac.stability(metrics=['high_perc'])
+
+    expected = set().union(*[r['res'].columns for r in sac.exp_data_reports.values()])
+    assert set(sac.total_res.index) == expected
+    assert expected < all_segments
+    assert set(stability['segment'].astype(str)) == expected
+    assert all((r['res'].loc['perc_of_total'] > 30).all() for r in sac.exp_data_reports.values())
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import data_fast_insights.calculations as calc
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_sweep_equals_runs_per_quantile(data, bins, model_data_factory, weighted):
+    if weighted:
+        data['cnt'] = np.random.default_rng(4).integers(1, 4, data.shape[0])
+    kwargs = {'weight_col': 'cnt'} if weighted else dict()
+    quantiles = [0.2, 0.5, 0.8]
+    sweep = calc.calculate_dependence_sweep(model_data_factory(**kwargs), y_quantiles=quantiles)
+
+    for q in quantiles:
+        model_data = model_data_factory(y_quantile=q, **kwargs)
+        res = calc.calculate_dependence(model_data=model_data)
+        part = sweep[sweep['y_quantile'] == q]
+        assert part['y_pivot'].iloc[0] == pytest.approx(model_data.y_pivot)
+        np.testing.assert_allclose(part['low_sum'], res.loc[part.index, 'low_sum'].astype(float))
+        np.testing.assert_allclose(part['low_perc'], res.loc[part.index, 'low_perc'].astype(float))
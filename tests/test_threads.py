@@ -0,0 +1,26 @@
+import pandas as pd
+
+from data_fast_insights import BinaryDependenceModelData
+import data_fast_insights.calculations as calc
+
+
+def _model_data(data):
+    return BinaryDependenceModelData(data, 'sales', {'color', 'shape'}, {'age', 'speed'})
+
+
+def test_binning_threads(data):
+    serial = calc.make_bins(model_data=_model_data(data))
+    parallel = calc.make_bins(model_data=_model_data(data), n_threads=3)
+
+    assert serial.keys() == parallel.keys()
+    for col in serial:
+        pd.testing.assert_frame_equal(parallel[col].reset_index(drop=True), serial[col].reset_index(drop=True))
+
+
+def test_conversion_threads(data, bins):
+    serial, parallel = _model_data(data), _model_data(data)
+    serial.convert_to_binary(bins=bins)
+    parallel.convert_to_binary(bins=bins, n_threads=3)
+
+    pd.testing.assert_frame_equal(parallel.data, serial.data)
+    assert parallel.col_links == serial.col_links
@@ -0,0 +1,29 @@
+import numpy as np
+
+import data_fast_insights.calculations as calc
+
+from conftest import make_model_data
+
+COLUMNS = ['total_sum', 'low_sum', 'low_perc', 'perc_of_total', 'target_delta_perc', 'group_importance']
+
+
+def test_weighted_equals_expanded(data, bins):
+    data['cnt'] = np.random.default_rng(6).integers(0, 4, data.shape[0])
+    weighted = make_model_data(data, bins, weight_col='cnt')
+    expanded = make_model_data(data.loc[data.index.repeat(data['cnt'])].drop(columns='cnt').reset_index(drop=True),
+                               bins)
+
+    assert weighted.y_pivot == expanded.y_pivot
+    res = calc.calculate_dependence(model_data=weighted)
+    expected = calc.calculate_dependence(model_data=expanded).loc[res.index]
+    np.testing.assert_allclose(res[COLUMNS].astype(float), expected[COLUMNS].astype(float), rtol=1e-9)
+
+
+def test_y_is_sum(data, bins):
+    data['cnt'] = np.random.default_rng(7).integers(1, 4, data.shape[0])
+    per_row = make_model_data(data, bins, weight_col='cnt')
+    data['sales'] = data['sales'] * data['cnt']
+    summed = make_model_data(data, bins, weight_col='cnt', y_is_sum=True)
+
+    np.testing.assert_allclose(calc.calculate_dependence(model_data=summed)[COLUMNS].astype(float),
+                               calc.calculate_dependence(model_data=per_row)[COLUMNS].astype(float), rtol=1e-9)